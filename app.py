@@ -1,11 +1,21 @@
-from flask import Flask, render_template, request, jsonify, send_file, Response
+from flask import Flask, render_template, request, jsonify, send_file, Response, abort, stream_with_context, url_for
+from flask.json.provider import DefaultJSONProvider
+from flask.sessions import SessionInterface, NullSession
+from flask_compress import Compress
 import os
 import json
 import io
 import csv
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from types import MappingProxyType
 
-from database import init_db, get_calculations
+import numpy as np
+import orjson
+
+import database
+from database import init_db, get_calculations_decoded, get_latest_id
 from modules.calculator import (
     ohms_law, rc_circuit, rl_circuit, rlc_circuit, filter_design,
     amplifier_gain, tolerance_analysis, power_rating_check, voltage_divider,
@@ -36,32 +46,161 @@ from modules.fault_diagnosis import (
     generate_diagnosis_report, get_all_symptoms, get_fault_types
 )
 from modules.iot_api import (
-    process_sensor_data, get_sensor_history, simulate_sensor_reading,
+    process_sensor_data, read_sensor_history, simulate_sensor_reading,
     simulate_batch_readings, get_device_status, check_alerts,
-    get_statistics, export_sensor_data, get_sensor_thresholds, get_available_devices
+    get_statistics, export_sensor_data, stream_sensor_csv, get_sensor_thresholds, get_available_devices
 )
 from modules.virtual_lab import (
-    run_rc_transient, run_rlc_resonance, run_diode_characteristics,
-    run_amplifier_gain, run_experiment_with_tolerance, generate_lab_report,
-    get_experiment_list, get_experiment_theory
+    EXPERIMENT_RUNNERS, MONTE_CARLO_MAX_SAMPLES, run_experiment_with_tolerance, run_experiment_monte_carlo,
+    downsample_result, generate_lab_report, get_experiment_list, get_experiment_theory
 )
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson so NumPy arrays serialize without .tolist()."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+    def _options(self):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+class NoopSessionInterface(SessionInterface):
+    """No view uses sessions, so skip signing/verifying the session cookie on every request."""
+
+    _null_session = NullSession()
+
+    def open_session(self, app, request):
+        return self._null_session
+
+    def save_session(self, app, session, response):
+        pass
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+app.session_interface = NoopSessionInterface()
 app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', 'electrohub-secret-key')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
 
 @app.after_request
 def add_header(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    if 'ETag' in response.headers:
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
     return response
 
 init_db()
 
+# PDF reports are rendered off the request thread; job state is kept in
+# SQLite so a status poll can be answered by any gunicorn worker. Up to
+# REPORT_THREADS builds run at once in each process, so report modules may
+# only share read-only objects (stylesheets, TableStyles), never flowables
+REPORT_THREADS = 2
+_report_executor = ThreadPoolExecutor(max_workers=REPORT_THREADS, thread_name_prefix='report')
+
+def _run_report(job_id, fn, *args):
+    try:
+        filepath = fn(*args)
+    except Exception as e:
+        database.finish_report_job(job_id, error=str(e))
+    else:
+        database.finish_report_job(job_id, filepath=filepath)
+
+def _submit_report(message, fn, *args):
+    job_id = uuid.uuid4().hex
+    database.create_report_job(job_id, message)
+    _report_executor.submit(_run_report, job_id, fn, *args)
+    status_url = url_for('api_job_status', job_id=job_id)
+    return jsonify({'job_id': job_id, 'status_url': status_url}), 202, {'Location': status_url}
+
+def _json_body():
+    body = request.get_data(cache=False)
+    if not body:
+        return {}
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        abort(400, description='Request body is not valid JSON')
+
+def _query_int(name, default, lo=1, hi=10000):
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(lo, min(hi, value))
+
+def _body_int(data, name, default, lo=1, hi=10000):
+    try:
+        value = int(data.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return max(lo, min(hi, value))
+
+_CONSTANTS_JSON = app.json.dumps({
+    'engineering_constants': ENGINEERING_CONSTANTS,
+    'unit_prefixes': UNIT_PREFIXES,
+    'rf_constants': get_rf_constants()
+}).encode()
+
+_SYMPTOMS_JSON = app.json.dumps({'symptoms': get_all_symptoms(), 'fault_types': get_fault_types()}).encode()
+
+_LAB_THEORY_JSON = {
+    name: app.json.dumps({'theory': get_experiment_theory(name)}).encode()
+    for name in get_experiment_list()
+}
+_UNKNOWN_THEORY_JSON = app.json.dumps({'theory': get_experiment_theory(None)}).encode()
+
+_PAGES = {}
+
+def _render_page(template, **context):
+    page = _PAGES.get(template)
+    if page is None or app.debug:
+        page = _PAGES[template] = render_template(template, **context).encode()
+    return Response(page, mimetype='text/html')
+
+def _conditional_json(table, build):
+    etag = str(get_latest_id(table))
+    # Compressed responses carry the coding in their ETag, e.g. "12:gzip"
+    for tag in request.if_none_match:
+        if tag.split(':', 1)[0] == etag:
+            response = Response(status=304)
+            response.set_etag(tag)
+            return response
+    response = jsonify(build())
+    response.set_etag(etag)
+    return response
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return _render_page('index.html')
 
 @app.route('/sw.js')
 def service_worker():
@@ -69,147 +208,76 @@ def service_worker():
 
 @app.route('/calculator')
 def calculator():
-    return render_template('calculator.html', constants=ENGINEERING_CONSTANTS, prefixes=UNIT_PREFIXES)
+    return _render_page('calculator.html', constants=ENGINEERING_CONSTANTS, prefixes=UNIT_PREFIXES)
 
 @app.route('/circuit')
 def circuit():
-    return render_template('circuit.html')
+    return _render_page('circuit.html')
 
 @app.route('/signal')
 def signal_page():
-    return render_template('signal.html')
+    return _render_page('signal.html')
 
 @app.route('/antenna')
 def antenna():
-    return render_template('antenna.html', rf_constants=get_rf_constants())
+    return _render_page('antenna.html', rf_constants=get_rf_constants())
 
 @app.route('/solar')
 def solar():
-    return render_template('solar.html')
+    return _render_page('solar.html')
 
 @app.route('/energy')
 def energy():
-    return render_template('energy.html')
+    return _render_page('energy.html')
 
 @app.route('/iot')
 def iot():
-    return render_template('iot.html', devices=get_available_devices(), thresholds=get_sensor_thresholds())
+    return _render_page('iot.html', devices=get_available_devices(), thresholds=get_sensor_thresholds())
 
 @app.route('/lab')
 def lab():
-    return render_template('lab.html', experiments=get_experiment_list())
-
-@app.route('/api/calculator/ohms-law', methods=['POST'])
-def api_ohms_law():
-    data = request.json
-    result, warnings = ohms_law(
-        voltage=data.get('voltage'),
-        current=data.get('current'),
-        resistance=data.get('resistance')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/rc-circuit', methods=['POST'])
-def api_rc_circuit():
-    data = request.json
-    result, warnings = rc_circuit(
-        resistance=data.get('resistance'),
-        capacitance=data.get('capacitance'),
-        frequency=data.get('frequency')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/rl-circuit', methods=['POST'])
-def api_rl_circuit():
-    data = request.json
-    result, warnings = rl_circuit(
-        resistance=data.get('resistance'),
-        inductance=data.get('inductance'),
-        frequency=data.get('frequency')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/rlc-circuit', methods=['POST'])
-def api_rlc_circuit():
-    data = request.json
-    result, warnings = rlc_circuit(
-        resistance=data.get('resistance'),
-        inductance=data.get('inductance'),
-        capacitance=data.get('capacitance'),
-        frequency=data.get('frequency')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/filter', methods=['POST'])
-def api_filter():
-    data = request.json
-    result, warnings = filter_design(
-        filter_type=data.get('filter_type'),
-        cutoff_freq=data.get('cutoff_freq'),
-        resistance=data.get('resistance'),
-        capacitance=data.get('capacitance')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/amplifier', methods=['POST'])
-def api_amplifier():
-    data = request.json
-    result, warnings = amplifier_gain(
-        input_voltage=data.get('input_voltage'),
-        output_voltage=data.get('output_voltage'),
-        gain_db=data.get('gain_db'),
-        gain_linear=data.get('gain_linear')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/tolerance', methods=['POST'])
-def api_tolerance():
-    data = request.json
-    result, warnings = tolerance_analysis(
-        nominal_value=data.get('nominal_value'),
-        tolerance_percent=data.get('tolerance_percent')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/power-rating', methods=['POST'])
-def api_power_rating():
-    data = request.json
-    result, warnings = power_rating_check(
-        voltage=data.get('voltage'),
-        current=data.get('current'),
-        rated_power=data.get('rated_power'),
-        derating_factor=data.get('derating_factor', 0.8)
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/voltage-divider', methods=['POST'])
-def api_voltage_divider():
-    data = request.json
-    result, warnings = voltage_divider(
-        vin=data.get('vin'),
-        r1=data.get('r1'),
-        r2=data.get('r2')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/calculator/unit-convert', methods=['POST'])
-def api_unit_convert():
-    data = request.json
-    result = convert_unit(
-        value=data.get('value'),
-        from_prefix=data.get('from_prefix', ''),
-        to_prefix=data.get('to_prefix', '')
-    )
-    return jsonify({'result': result})
+    return _render_page('lab.html', experiments=get_experiment_list())
+
+def _make_view(fn, fields):
+    def view():
+        data = _json_body()
+        out = fn(**{key: data.get(key, default) for key, default in fields.items()})
+        if isinstance(out, tuple):
+            result, warnings = out
+            return jsonify({'result': result, 'warnings': warnings})
+        return jsonify({'result': out})
+    return view
+
+_POST_ROUTES = [
+    ('/api/calculator/ohms-law', 'api_ohms_law', ohms_law, {'voltage': None, 'current': None, 'resistance': None}),
+    ('/api/calculator/rc-circuit', 'api_rc_circuit', rc_circuit, {'resistance': None, 'capacitance': None, 'frequency': None}),
+    ('/api/calculator/rl-circuit', 'api_rl_circuit', rl_circuit, {'resistance': None, 'inductance': None, 'frequency': None}),
+    ('/api/calculator/rlc-circuit', 'api_rlc_circuit', rlc_circuit, {'resistance': None, 'inductance': None, 'capacitance': None, 'frequency': None}),
+    ('/api/calculator/filter', 'api_filter', filter_design, {'filter_type': None, 'cutoff_freq': None, 'resistance': None, 'capacitance': None}),
+    ('/api/calculator/amplifier', 'api_amplifier', amplifier_gain, {'input_voltage': None, 'output_voltage': None, 'gain_db': None, 'gain_linear': None}),
+    ('/api/calculator/tolerance', 'api_tolerance', tolerance_analysis, {'nominal_value': None, 'tolerance_percent': None}),
+    ('/api/calculator/power-rating', 'api_power_rating', power_rating_check, {'voltage': None, 'current': None, 'rated_power': None, 'derating_factor': 0.8}),
+    ('/api/calculator/voltage-divider', 'api_voltage_divider', voltage_divider, {'vin': None, 'r1': None, 'r2': None}),
+    ('/api/calculator/unit-convert', 'api_unit_convert', convert_unit, {'value': None, 'from_prefix': '', 'to_prefix': ''}),
+    ('/api/circuit/frequency-response', 'api_frequency_response', frequency_response, {'resistance': None, 'inductance': None, 'capacitance': None, 'freq_start': 1, 'freq_end': 1e6, 'points': 100}),
+    ('/api/circuit/efficiency', 'api_efficiency', efficiency_analysis, {'input_power': None, 'output_power': None, 'losses': None}),
+    ('/api/signal/generate', 'api_signal_generate', generate_signal, {'signal_type': 'sine', 'frequency': 1000, 'amplitude': 1, 'duration': 0.01, 'sample_rate': 10000, 'phase': 0, 'dc_offset': 0}),
+    ('/api/signal/fft', 'api_signal_fft', compute_fft, {'signal_data': None, 'sample_rate': None}),
+    ('/api/signal/noise', 'api_signal_noise', add_noise, {'signal_data': None, 'noise_type': 'gaussian', 'snr_db': 20}),
+    ('/api/signal/bandwidth', 'api_signal_bandwidth', bandwidth_analysis, {'signal_data': None, 'sample_rate': None, 'threshold_db': -3}),
+    ('/api/signal/filter', 'api_signal_filter', filter_signal, {'signal_data': None, 'sample_rate': None, 'filter_type': None, 'cutoff_freq': None, 'order': 4}),
+]
+
+for path, endpoint, fn, fields in _POST_ROUTES:
+    app.add_url_rule(path, endpoint, _make_view(fn, fields), methods=['POST'])
 
 @app.route('/api/calculator/history')
 def api_calculator_history():
-    history = get_calculations(limit=50)
-    return jsonify([dict(row) for row in history])
+    return _conditional_json('calculations', lambda: get_calculations_decoded(limit=50))
 
 @app.route('/api/circuit/dc-analysis', methods=['POST'])
 def api_dc_analysis():
-    data = request.json
+    data = _json_body()
     result, warnings = dc_analysis(
         voltage_sources=data.get('voltage_sources', []),
         current_sources=data.get('current_sources', []),
@@ -221,7 +289,7 @@ def api_dc_analysis():
 
 @app.route('/api/circuit/ac-analysis', methods=['POST'])
 def api_ac_analysis():
-    data = request.json
+    data = _json_body()
     result, warnings = ac_analysis(
         voltage_amplitude=data.get('voltage_amplitude'),
         frequency=data.get('frequency'),
@@ -232,87 +300,9 @@ def api_ac_analysis():
     conclusion = generate_conclusion('ac', result, warnings)
     return jsonify({'result': result, 'warnings': warnings, 'conclusion': conclusion})
 
-@app.route('/api/circuit/frequency-response', methods=['POST'])
-def api_frequency_response():
-    data = request.json
-    result = frequency_response(
-        resistance=data.get('resistance'),
-        inductance=data.get('inductance'),
-        capacitance=data.get('capacitance'),
-        freq_start=data.get('freq_start', 1),
-        freq_end=data.get('freq_end', 1e6),
-        points=data.get('points', 100)
-    )
-    return jsonify({'result': result})
-
-@app.route('/api/circuit/efficiency', methods=['POST'])
-def api_efficiency():
-    data = request.json
-    result, warnings = efficiency_analysis(
-        input_power=data.get('input_power'),
-        output_power=data.get('output_power'),
-        losses=data.get('losses')
-    )
-    return jsonify({'result': result, 'warnings': warnings})
-
-@app.route('/api/signal/generate', methods=['POST'])
-def api_signal_generate():
-    data = request.json
-    result = generate_signal(
-        signal_type=data.get('signal_type', 'sine'),
-        frequency=data.get('frequency', 1000),
-        amplitude=data.get('amplitude', 1),
-        duration=data.get('duration', 0.01),
-        sample_rate=data.get('sample_rate', 10000),
-        phase=data.get('phase', 0),
-        dc_offset=data.get('dc_offset', 0)
-    )
-    return jsonify({'result': result})
-
-@app.route('/api/signal/fft', methods=['POST'])
-def api_signal_fft():
-    data = request.json
-    result = compute_fft(
-        signal_data=data.get('signal_data'),
-        sample_rate=data.get('sample_rate')
-    )
-    return jsonify({'result': result})
-
-@app.route('/api/signal/noise', methods=['POST'])
-def api_signal_noise():
-    data = request.json
-    result = add_noise(
-        signal_data=data.get('signal_data'),
-        noise_type=data.get('noise_type', 'gaussian'),
-        snr_db=data.get('snr_db', 20)
-    )
-    return jsonify({'result': result})
-
-@app.route('/api/signal/bandwidth', methods=['POST'])
-def api_signal_bandwidth():
-    data = request.json
-    result = bandwidth_analysis(
-        signal_data=data.get('signal_data'),
-        sample_rate=data.get('sample_rate'),
-        threshold_db=data.get('threshold_db', -3)
-    )
-    return jsonify({'result': result})
-
-@app.route('/api/signal/filter', methods=['POST'])
-def api_signal_filter():
-    data = request.json
-    result = filter_signal(
-        signal_data=data.get('signal_data'),
-        sample_rate=data.get('sample_rate'),
-        filter_type=data.get('filter_type'),
-        cutoff_freq=data.get('cutoff_freq'),
-        order=data.get('order', 4)
-    )
-    return jsonify({'result': result})
-
 @app.route('/api/antenna/frequency-wavelength', methods=['POST'])
 def api_freq_wavelength():
-    data = request.json
+    data = _json_body()
     if data.get('frequency'):
         result = frequency_to_wavelength(data.get('frequency'))
     else:
@@ -321,7 +311,7 @@ def api_freq_wavelength():
 
 @app.route('/api/antenna/dipole', methods=['POST'])
 def api_dipole():
-    data = request.json
+    data = _json_body()
     result, warnings = dipole_antenna(
         frequency=data.get('frequency'),
         wire_diameter=data.get('wire_diameter', 0.002)
@@ -332,7 +322,7 @@ def api_dipole():
 
 @app.route('/api/antenna/yagi', methods=['POST'])
 def api_yagi():
-    data = request.json
+    data = _json_body()
     result, warnings = yagi_antenna(
         frequency=data.get('frequency'),
         num_elements=data.get('num_elements', 3),
@@ -342,7 +332,7 @@ def api_yagi():
 
 @app.route('/api/antenna/impedance', methods=['POST'])
 def api_impedance():
-    data = request.json
+    data = _json_body()
     result, warnings = impedance_matching(
         source_impedance=data.get('source_impedance'),
         load_impedance=data.get('load_impedance'),
@@ -352,7 +342,7 @@ def api_impedance():
 
 @app.route('/api/antenna/link-budget', methods=['POST'])
 def api_link_budget():
-    data = request.json
+    data = _json_body()
     result, warnings = link_budget(
         tx_power_dbm=data.get('tx_power_dbm'),
         tx_gain_dbi=data.get('tx_gain_dbi'),
@@ -364,7 +354,7 @@ def api_link_budget():
 
 @app.route('/api/solar/panel-sizing', methods=['POST'])
 def api_panel_sizing():
-    data = request.json
+    data = _json_body()
     result, warnings = panel_sizing(
         daily_energy_kwh=data.get('daily_energy_kwh'),
         peak_sun_hours=data.get('peak_sun_hours'),
@@ -375,7 +365,7 @@ def api_panel_sizing():
 
 @app.route('/api/solar/battery-sizing', methods=['POST'])
 def api_battery_sizing():
-    data = request.json
+    data = _json_body()
     result, warnings = battery_sizing(
         daily_energy_kwh=data.get('daily_energy_kwh'),
         autonomy_days=data.get('autonomy_days'),
@@ -387,7 +377,7 @@ def api_battery_sizing():
 
 @app.route('/api/solar/inverter-sizing', methods=['POST'])
 def api_inverter_sizing():
-    data = request.json
+    data = _json_body()
     result, warnings = inverter_sizing(
         peak_load_w=data.get('peak_load_w'),
         surge_factor=data.get('surge_factor', 1.25),
@@ -397,7 +387,7 @@ def api_inverter_sizing():
 
 @app.route('/api/solar/losses', methods=['POST'])
 def api_solar_losses():
-    data = request.json
+    data = _json_body()
     result = system_losses(
         panel_capacity_kw=data.get('panel_capacity_kw'),
         soiling=data.get('soiling', 0.02),
@@ -411,7 +401,7 @@ def api_solar_losses():
 
 @app.route('/api/solar/roi', methods=['POST'])
 def api_solar_roi():
-    data = request.json
+    data = _json_body()
     result, warnings = roi_analysis(
         system_cost=data.get('system_cost'),
         annual_production_kwh=data.get('annual_production_kwh'),
@@ -424,9 +414,9 @@ def api_solar_roi():
 
 @app.route('/api/solar/report', methods=['POST'])
 def api_solar_report():
-    data = request.json
-    filepath = generate_solar_report(data, f"solar_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-    return jsonify({'filepath': filepath, 'message': 'Report generated successfully'})
+    data = _json_body()
+    filename = f"solar_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
+    return _submit_report('Report generated successfully', generate_solar_report, data, filename)
 
 @app.route('/api/energy/analyze', methods=['POST'])
 def api_energy_analyze():
@@ -437,20 +427,15 @@ def api_energy_analyze():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    filepath = os.path.join('static', 'plots', 'temp_upload.csv')
-    file.save(filepath)
-    
     cost_per_kwh = float(request.form.get('cost_per_kwh', 0.12))
-    result, warnings = analyze_csv(filepath, cost_per_kwh=cost_per_kwh)
-    
-    os.remove(filepath)
+    result, warnings = analyze_csv(file.stream, cost_per_kwh=cost_per_kwh, filename=file.filename)
     
     recommendations = generate_recommendations(result)
     return jsonify({'result': result, 'warnings': warnings, 'recommendations': recommendations})
 
 @app.route('/api/energy/efficiency', methods=['POST'])
 def api_energy_efficiency():
-    data = request.json
+    data = _json_body()
     result = calculate_efficiency(
         input_energy=data.get('input_energy'),
         output_energy=data.get('output_energy'),
@@ -461,7 +446,7 @@ def api_energy_efficiency():
 
 @app.route('/api/energy/cost', methods=['POST'])
 def api_energy_cost():
-    data = request.json
+    data = _json_body()
     result = cost_estimation(
         energy_kwh=data.get('energy_kwh'),
         rate_structure=data.get('rate_structure', 'flat'),
@@ -474,12 +459,11 @@ def api_energy_cost():
 
 @app.route('/api/energy/history')
 def api_energy_history():
-    history = get_historical_data(limit=20)
-    return jsonify([dict(row) for row in history])
+    return _conditional_json('energy_data', lambda: [dict(row) for row in get_historical_data(limit=20)])
 
 @app.route('/api/fault/diagnose', methods=['POST'])
 def api_fault_diagnose():
-    data = request.json
+    data = _json_body()
     symptoms = data.get('symptoms', [])
     diagnosis = diagnose_fault(symptoms)
     report = generate_diagnosis_report(symptoms, diagnosis)
@@ -487,7 +471,7 @@ def api_fault_diagnose():
 
 @app.route('/api/fault/repair-steps', methods=['POST'])
 def api_repair_steps():
-    data = request.json
+    data = _json_body()
     result = get_repair_steps(
         fault_type=data.get('fault_type'),
         cause_index=data.get('cause_index', 0)
@@ -496,17 +480,17 @@ def api_repair_steps():
 
 @app.route('/api/fault/component-tests', methods=['POST'])
 def api_component_tests():
-    data = request.json
+    data = _json_body()
     result = get_component_tests(data.get('component_type'))
     return jsonify({'result': result})
 
 @app.route('/api/fault/symptoms')
 def api_get_symptoms():
-    return jsonify({'symptoms': get_all_symptoms(), 'fault_types': get_fault_types()})
+    return Response(_SYMPTOMS_JSON, mimetype='application/json')
 
 @app.route('/api/iot/data', methods=['POST'])
 def api_iot_data():
-    data = request.json
+    data = _json_body()
     result = process_sensor_data(
         sensor_id=data.get('sensor_id'),
         value=data.get('value'),
@@ -517,21 +501,21 @@ def api_iot_data():
 @app.route('/api/iot/history')
 def api_iot_history():
     sensor_id = request.args.get('sensor_id')
-    limit = int(request.args.get('limit', 100))
-    history = get_sensor_history(sensor_id, limit)
-    return jsonify({'history': history})
+    limit = _query_int('limit', 100)
+    return _conditional_json('iot_readings', lambda: {'history': read_sensor_history(sensor_id, limit)})
 
 @app.route('/api/iot/simulate', methods=['POST'])
 def api_iot_simulate():
-    data = request.json
+    data = _json_body()
     sensor_id = data.get('sensor_id')
     result = simulate_sensor_reading(sensor_id)
     return jsonify({'result': result})
 
 @app.route('/api/iot/simulate-batch', methods=['POST'])
 def api_iot_simulate_batch():
-    data = request.json
-    num_readings = data.get('num_readings', 10)
+    data = _json_body()
+    # Each reading is one row per simulated device, allocated up front
+    num_readings = _body_int(data, 'num_readings', 10, lo=0, hi=1000)
     results = simulate_batch_readings(num_readings)
     return jsonify({'results': results})
 
@@ -549,7 +533,7 @@ def api_iot_alerts():
 @app.route('/api/iot/statistics')
 def api_iot_statistics():
     sensor_id = request.args.get('sensor_id')
-    hours = int(request.args.get('hours', 24))
+    hours = _query_int('hours', 24, hi=24 * 365)
     stats = get_statistics(sensor_id, hours)
     return jsonify({'statistics': stats})
 
@@ -557,15 +541,16 @@ def api_iot_statistics():
 def api_iot_export():
     sensor_id = request.args.get('sensor_id')
     format_type = request.args.get('format', 'json')
-    data = export_sensor_data(sensor_id, format_type)
+    limit = _query_int('limit', 1000)
     
     if format_type == 'csv':
-        return Response(data, mimetype='text/csv', headers={'Content-Disposition': 'attachment;filename=sensor_data.csv'})
-    return jsonify({'data': data})
+        return Response(stream_with_context(stream_sensor_csv(sensor_id, limit)), mimetype='text/csv',
+                        headers={'Content-Disposition': 'attachment;filename=sensor_data.csv'})
+    return jsonify({'data': export_sensor_data(sensor_id, format_type, limit)})
 
 @app.route('/api/lab/run', methods=['POST'])
 def api_lab_run():
-    data = request.json
+    data = _json_body()
     experiment = data.get('experiment')
     params = data.get('parameters', {})
     with_tolerance = data.get('with_tolerance', False)
@@ -574,38 +559,58 @@ def api_lab_run():
     if with_tolerance:
         result = run_experiment_with_tolerance(experiment, params, tolerance_percent)
     else:
-        if experiment == 'rc_transient':
-            result = run_rc_transient(**params)
-        elif experiment == 'rlc_resonance':
-            result = run_rlc_resonance(**params)
-        elif experiment == 'diode_characteristics':
-            result = run_diode_characteristics(**params)
-        elif experiment == 'amplifier_gain':
-            result = run_amplifier_gain(**params)
-        else:
+        runner = EXPERIMENT_RUNNERS.get(experiment)
+        if runner is None:
             return jsonify({'error': 'Unknown experiment'}), 400
+        result = runner(**params)
+    
+    if data.get('downsample', False):
+        result = downsample_result(result)
     
     return jsonify({'result': result})
 
+@app.route('/api/lab/monte-carlo', methods=['POST'])
+def api_lab_monte_carlo():
+    data = _json_body()
+    try:
+        samples = int(data.get('samples', 1000))
+    except (TypeError, ValueError):
+        samples = 1000
+    samples = max(1, min(MONTE_CARLO_MAX_SAMPLES, samples))
+    
+    result = run_experiment_monte_carlo(data.get('experiment'), data.get('parameters', {}),
+                                        samples, data.get('tolerance_percent', 5))
+    if 'error' in result:
+        return jsonify(result), 400
+    return jsonify({'result': result})
+
 @app.route('/api/lab/report', methods=['POST'])
 def api_lab_report():
-    data = request.json
-    filepath = generate_lab_report(data.get('result'))
-    return jsonify({'filepath': filepath, 'message': 'Lab report generated successfully'})
+    data = _json_body()
+    filename = f"lab_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
+    return _submit_report('Lab report generated successfully', generate_lab_report, data.get('result'), filename)
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = database.get_report_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    if job['status'] == 'pending':
+        return jsonify({'status': 'pending'}), 202
+    
+    if job['status'] == 'error':
+        return jsonify({'status': 'error', 'error': job['error']}), 500
+    return jsonify({'status': 'done', 'filepath': job['filepath'], 'message': job['message']})
 
 @app.route('/api/lab/theory')
 def api_lab_theory():
     experiment = request.args.get('experiment')
-    theory = get_experiment_theory(experiment)
-    return jsonify({'theory': theory})
+    return Response(_LAB_THEORY_JSON.get(experiment, _UNKNOWN_THEORY_JSON), mimetype='application/json')
 
 @app.route('/api/constants')
 def api_constants():
-    return jsonify({
-        'engineering_constants': ENGINEERING_CONSTANTS,
-        'unit_prefixes': UNIT_PREFIXES,
-        'rf_constants': get_rf_constants()
-    })
+    return Response(_CONSTANTS_JSON, mimetype='application/json')
 
 @app.route('/download/<path:filename>')
 def download_file(filename):
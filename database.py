@@ -1,12 +1,73 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+import orjson
 from datetime import datetime
 
 DATABASE_PATH = 'electrohub.db'
 
+_local = threading.local()
+
+# Statements are kept as constants so every call reuses the same SQL text
+# and hits the connection's prepared-statement cache.
+_INS_CALC = '''
+    INSERT INTO calculations (module, input_data, result, warnings)
+    VALUES (?, ?, ?, ?)
+'''
+_SEL_CALC = 'SELECT * FROM calculations ORDER BY timestamp DESC LIMIT ?'
+_SEL_CALC_BY_MODULE = 'SELECT * FROM calculations WHERE module = ? ORDER BY timestamp DESC LIMIT ?'
+
+_INS_IOT = '''
+    INSERT INTO iot_readings (sensor, value, unit, alert)
+    VALUES (?, ?, ?, ?)
+'''
+_SEL_IOT = 'SELECT * FROM iot_readings ORDER BY timestamp DESC LIMIT ?'
+_SEL_IOT_BY_SENSOR = 'SELECT * FROM iot_readings WHERE sensor = ? ORDER BY timestamp DESC LIMIT ?'
+_ITER_IOT = '''
+    SELECT id, sensor, value, unit, alert, timestamp FROM iot_readings
+    ORDER BY timestamp DESC LIMIT ?
+'''
+_ITER_IOT_BY_SENSOR = '''
+    SELECT id, sensor, value, unit, alert, timestamp FROM iot_readings
+    WHERE sensor = ? ORDER BY timestamp DESC LIMIT ?
+'''
+# Each sensor's newest reading is one seek on the sensor/timestamp index;
+# get_latest_readings_per_sensor glues one of these per sensor with UNION ALL
+_SEL_IOT_LATEST_ONE = '''
+    SELECT * FROM (
+        SELECT * FROM iot_readings WHERE sensor = ? ORDER BY timestamp DESC LIMIT 1
+    )
+'''
+
+_INS_ENERGY = '''
+    INSERT INTO energy_data (filename, total_energy, peak_load, efficiency, cost)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_SEL_ENERGY = 'SELECT * FROM energy_data ORDER BY id DESC LIMIT ?'
+
+_INS_LAB = '''
+    INSERT INTO lab_reports (experiment, result, conclusion, pdf_path, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_SEL_LAB = 'SELECT * FROM lab_reports ORDER BY timestamp DESC LIMIT ?'
+
+_INS_JOB = 'INSERT INTO report_jobs (job_id, message) VALUES (?, ?)'
+_UPD_JOB = 'UPDATE report_jobs SET status = ?, filepath = ?, error = ? WHERE job_id = ?'
+_SEL_JOB = 'SELECT status, filepath, error, message FROM report_jobs WHERE job_id = ?'
+_PRUNE_JOBS = "DELETE FROM report_jobs WHERE created < datetime('now', ?)"
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_PATH, detect_types=0, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')
+        _local.conn = conn
     return conn
 
 def init_db():
@@ -17,8 +78,8 @@ def init_db():
         CREATE TABLE IF NOT EXISTS calculations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             module TEXT,
-            input_data TEXT,
-            result TEXT,
+            input_data BLOB,
+            result BLOB,
             warnings TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
@@ -57,96 +118,163 @@ def init_db():
         )
     ''')
     
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT DEFAULT 'pending',
+            message TEXT,
+            filepath TEXT,
+            error TEXT,
+            created DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_iot_readings_sensor_timestamp
+        ON iot_readings (sensor, timestamp DESC)
+    ''')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_calculations_module_timestamp
+        ON calculations (module, timestamp DESC)
+    ''')
+    
     conn.commit()
-    conn.close()
+
+def _dump_json(data):
+    return orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def _load_json(value):
+    # Rows written before calculations were stored as JSON hold str() text
+    if isinstance(value, bytes):
+        return orjson.loads(value)
+    return value
 
 def save_calculation(module, input_data, result, warnings=""):
+    row = (module, _dump_json(input_data), _dump_json(result), warnings)
+    batch = getattr(_local, 'batch', None)
+    if batch is not None:
+        batch.append(row)
+        if len(batch) >= _local.batch_size:
+            _flush_calculations(batch)
+        return
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO calculations (module, input_data, result, warnings)
-        VALUES (?, ?, ?, ?)
-    ''', (module, str(input_data), str(result), warnings))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(_INS_CALC, row)
+
+def _flush_calculations(batch):
+    if batch:
+        conn = get_db_connection()
+        with conn:
+            conn.executemany(_INS_CALC, batch)
+        batch.clear()
+
+@contextmanager
+def batched_saves(batch_size=1000):
+    # Nested use joins the outer batch
+    if getattr(_local, 'batch', None) is not None:
+        yield
+        return
+    _local.batch = []
+    _local.batch_size = batch_size
+    try:
+        yield
+    finally:
+        batch = _local.batch
+        _local.batch = None
+        _flush_calculations(batch)
+
+def get_latest_id(table):
+    if table not in ('calculations', 'iot_readings', 'energy_data', 'lab_reports'):
+        raise ValueError(f'Unknown table: {table}')
+    conn = get_db_connection()
+    return conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
 
 def get_calculations(module=None, limit=50):
     conn = get_db_connection()
-    cursor = conn.cursor()
     if module:
-        cursor.execute('''
-            SELECT * FROM calculations WHERE module = ? 
-            ORDER BY timestamp DESC LIMIT ?
-        ''', (module, limit))
-    else:
-        cursor.execute('''
-            SELECT * FROM calculations ORDER BY timestamp DESC LIMIT ?
-        ''', (limit,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+        return conn.execute(_SEL_CALC_BY_MODULE, (module, limit)).fetchall()
+    return conn.execute(_SEL_CALC, (limit,)).fetchall()
+
+def get_calculations_decoded(module=None, limit=50):
+    calculations = []
+    for row in get_calculations(module, limit):
+        calculation = dict(row)
+        calculation['input_data'] = _load_json(calculation['input_data'])
+        calculation['result'] = _load_json(calculation['result'])
+        calculations.append(calculation)
+    return calculations
 
 def save_iot_reading(sensor, value, unit, alert=0):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO iot_readings (sensor, value, unit, alert)
-        VALUES (?, ?, ?, ?)
-    ''', (sensor, value, unit, alert))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(_INS_IOT, (sensor, value, unit, alert))
+
+def save_iot_readings_bulk(rows):
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(_INS_IOT, rows)
 
 def get_iot_readings(sensor=None, limit=100):
     conn = get_db_connection()
-    cursor = conn.cursor()
     if sensor:
-        cursor.execute('''
-            SELECT * FROM iot_readings WHERE sensor = ? 
-            ORDER BY timestamp DESC LIMIT ?
-        ''', (sensor, limit))
-    else:
-        cursor.execute('''
-            SELECT * FROM iot_readings ORDER BY timestamp DESC LIMIT ?
-        ''', (limit,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+        return conn.execute(_SEL_IOT_BY_SENSOR, (sensor, limit)).fetchall()
+    return conn.execute(_SEL_IOT, (limit,)).fetchall()
+
+@lru_cache(maxsize=16)
+def _latest_readings_sql(count):
+    return ' UNION ALL '.join([_SEL_IOT_LATEST_ONE] * count)
+
+def get_latest_readings_per_sensor(sensors):
+    sensors = tuple(sensors)
+    if not sensors:
+        return []
+    conn = get_db_connection()
+    return conn.execute(_latest_readings_sql(len(sensors)), sensors).fetchall()
+
+def iter_iot_readings(sensor=None, limit=1000):
+    conn = get_db_connection()
+    if sensor:
+        return conn.execute(_ITER_IOT_BY_SENSOR, (sensor, limit))
+    return conn.execute(_ITER_IOT, (limit,))
 
 def save_energy_data(filename, total_energy, peak_load, efficiency, cost):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO energy_data (filename, total_energy, peak_load, efficiency, cost)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (filename, total_energy, peak_load, efficiency, cost))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(_INS_ENERGY, (filename, total_energy, peak_load, efficiency, cost))
 
 def get_energy_data(limit=50):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM energy_data ORDER BY id DESC LIMIT ?', (limit,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return conn.execute(_SEL_ENERGY, (limit,)).fetchall()
 
 def save_lab_report(experiment, result, conclusion, pdf_path):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO lab_reports (experiment, result, conclusion, pdf_path, timestamp)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (experiment, result, conclusion, pdf_path, datetime.now()))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(_INS_LAB, (experiment, result, conclusion, pdf_path, datetime.now()))
 
 def get_lab_reports(limit=50):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM lab_reports ORDER BY timestamp DESC LIMIT ?', (limit,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return conn.execute(_SEL_LAB, (limit,)).fetchall()
+
+# Report jobs live in the database rather than in process memory so that a
+# status poll can land on any server worker
+def create_report_job(job_id, message, max_age_s=3600):
+    conn = get_db_connection()
+    with conn:
+        # Finished jobs stay pollable until they age out; this also clears
+        # pending jobs lost with a worker that died mid-render
+        conn.execute(_PRUNE_JOBS, (f'-{int(max_age_s)} seconds',))
+        conn.execute(_INS_JOB, (job_id, message))
+
+def finish_report_job(job_id, filepath=None, error=None):
+    status = 'done' if error is None else 'error'
+    conn = get_db_connection()
+    with conn:
+        conn.execute(_UPD_JOB, (status, filepath, error, job_id))
+
+def get_report_job(job_id):
+    conn = get_db_connection()
+    return conn.execute(_SEL_JOB, (job_id,)).fetchone()
 
 if __name__ == '__main__':
     init_db()
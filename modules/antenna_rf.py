@@ -1,5 +1,7 @@
 import numpy as np
 import math
+from bisect import bisect_right
+from functools import lru_cache
 from database import save_calculation
 
 SPEED_OF_LIGHT = 299792458
@@ -10,6 +12,17 @@ RF_CONSTANTS = {
     'permeability_free_space': 1.2566370614e-6
 }
 
+_TWO_PI = 2 * math.pi
+
+# Fixed model impedances, formatted once rather than on every call
+_DIPOLE_INPUT_IMPEDANCE = str(73 + 42.5j)
+_YAGI_INPUT_IMPEDANCE = str(20 + 0j)
+
+# Half-wave dipole gain is fixed in this model, so the aperture factor
+# G / (4*pi) can be evaluated once
+_DIPOLE_GAIN_DBI = 2.15
+_DIPOLE_APERTURE_FACTOR = 10**(_DIPOLE_GAIN_DBI / 10) / (4 * math.pi)
+
 def frequency_to_wavelength(frequency):
     wavelength = SPEED_OF_LIGHT / frequency
     return {
@@ -30,6 +43,28 @@ def wavelength_to_frequency(wavelength):
         'frequency_ghz': frequency / 1e9
     }
 
+def frequencies_to_wavelengths(frequencies):
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    wavelengths = SPEED_OF_LIGHT / frequencies
+    return {
+        'frequency_hz': frequencies,
+        'frequency_mhz': frequencies / 1e6,
+        'frequency_ghz': frequencies / 1e9,
+        'wavelength_m': wavelengths,
+        'wavelength_cm': wavelengths * 100,
+        'wavelength_mm': wavelengths * 1000
+    }
+
+def wavelengths_to_frequencies(wavelengths):
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    frequencies = SPEED_OF_LIGHT / wavelengths
+    return {
+        'wavelength_m': wavelengths,
+        'frequency_hz': frequencies,
+        'frequency_mhz': frequencies / 1e6,
+        'frequency_ghz': frequencies / 1e9
+    }
+
 def dipole_antenna(frequency, wire_diameter=0.002):
     warnings = []
     wavelength = SPEED_OF_LIGHT / frequency
@@ -41,12 +76,11 @@ def dipole_antenna(frequency, wire_diameter=0.002):
     practical_length = half_wave_length * velocity_factor
     
     radiation_resistance = 73
-    input_impedance = 73 + 42.5j
     
-    gain_dbi = 2.15
+    gain_dbi = _DIPOLE_GAIN_DBI
     gain_dbd = 0
     
-    effective_aperture = (wavelength**2 * 10**(gain_dbi/10)) / (4 * math.pi)
+    effective_aperture = wavelength * wavelength * _DIPOLE_APERTURE_FACTOR
     
     beamwidth_e = 78
     beamwidth_h = 360
@@ -58,7 +92,7 @@ def dipole_antenna(frequency, wire_diameter=0.002):
         'practical_length_m': practical_length,
         'quarter_wave_length_m': quarter_wave_length,
         'radiation_resistance_ohm': radiation_resistance,
-        'input_impedance': str(input_impedance),
+        'input_impedance': _DIPOLE_INPUT_IMPEDANCE,
         'gain_dbi': gain_dbi,
         'gain_dbd': gain_dbd,
         'effective_aperture_m2': effective_aperture,
@@ -110,8 +144,6 @@ def yagi_antenna(frequency, num_elements=3, boom_length_wavelengths=None):
     
     beamwidth = 60 / (num_elements - 1) if num_elements > 1 else 60
     
-    input_impedance = 20 + 0j
-    
     bandwidth_percent = 5 / num_elements * 3
     
     result = {
@@ -127,7 +159,7 @@ def yagi_antenna(frequency, num_elements=3, boom_length_wavelengths=None):
         'gain_dbi': gain_dbi,
         'front_to_back_db': front_to_back,
         'beamwidth_degrees': beamwidth,
-        'input_impedance_ohm': str(input_impedance),
+        'input_impedance_ohm': _YAGI_INPUT_IMPEDANCE,
         'bandwidth_percent': bandwidth_percent
     }
     
@@ -144,16 +176,16 @@ def yagi_antenna(frequency, num_elements=3, boom_length_wavelengths=None):
 
 def impedance_matching(source_impedance, load_impedance, frequency):
     warnings = []
-    wavelength = SPEED_OF_LIGHT / frequency
     
     zs = complex(source_impedance) if isinstance(source_impedance, str) else source_impedance
     zl = complex(load_impedance) if isinstance(load_impedance, str) else load_impedance
     
     gamma = (zl - zs) / (zl + zs)
-    vswr = (1 + abs(gamma)) / (1 - abs(gamma)) if abs(gamma) < 1 else float('inf')
+    mag = abs(gamma)
+    vswr = (1 + mag) / (1 - mag) if mag < 1 else float('inf')
     
-    return_loss = -20 * np.log10(abs(gamma)) if abs(gamma) > 0 else float('inf')
-    mismatch_loss = 10 * np.log10(1 - abs(gamma)**2) if abs(gamma) < 1 else float('-inf')
+    return_loss = -20 * math.log10(mag) if mag > 0 else float('inf')
+    mismatch_loss = 10 * math.log10(1 - mag * mag) if mag < 1 else float('-inf')
     
     if abs(zl.imag) < 1e-10 and abs(zs.imag) < 1e-10:
         q = math.sqrt(max(zs.real, zl.real) / min(zs.real, zl.real) - 1)
@@ -165,11 +197,12 @@ def impedance_matching(source_impedance, load_impedance, frequency):
             xc = zl.real / q
             xl = q * zs.real
         
+        omega = _TWO_PI * frequency
         l_match = {
             'series_reactance': xl,
             'shunt_reactance': xc,
-            'series_inductor_h': xl / (2 * math.pi * frequency),
-            'shunt_capacitor_f': 1 / (2 * math.pi * frequency * xc)
+            'series_inductor_h': xl / omega,
+            'shunt_capacitor_f': 1 / (omega * xc)
         }
     else:
         l_match = {'note': 'Complex impedance matching requires Smith chart analysis'}
@@ -177,11 +210,11 @@ def impedance_matching(source_impedance, load_impedance, frequency):
     result = {
         'source_impedance': str(zs),
         'load_impedance': str(zl),
-        'reflection_coefficient': abs(gamma),
-        'reflection_coefficient_db': float(return_loss),
+        'reflection_coefficient': mag,
+        'reflection_coefficient_db': return_loss,
         'vswr': vswr,
-        'return_loss_db': float(return_loss),
-        'mismatch_loss_db': float(mismatch_loss),
+        'return_loss_db': return_loss,
+        'mismatch_loss_db': mismatch_loss,
         'l_network_match': l_match,
         'frequency_mhz': frequency / 1e6
     }
@@ -199,15 +232,19 @@ def impedance_matching(source_impedance, load_impedance, frequency):
 
 def link_budget(tx_power_dbm, tx_gain_dbi, rx_gain_dbi, distance_km, frequency):
     warnings = []
+    # Free-space path loss takes the log of both, so they must be positive
+    if distance_km <= 0 or frequency <= 0:
+        return {'error': 'Distance and frequency must be positive'}, ['Invalid link parameters']
+    
     wavelength = SPEED_OF_LIGHT / frequency
     
-    fspl_db = 20 * np.log10(distance_km * 1000) + 20 * np.log10(frequency) - 147.55
+    fspl_db = 20 * math.log10(distance_km * 1000) + 20 * math.log10(frequency) - 147.55
     
     eirp_dbm = tx_power_dbm + tx_gain_dbi
     
     rx_power_dbm = eirp_dbm - fspl_db + rx_gain_dbi
     
-    thermal_noise_dbm = -174 + 10 * np.log10(1e6)
+    thermal_noise_dbm = -174 + 10 * math.log10(1e6)
     
     snr_db = rx_power_dbm - thermal_noise_dbm
     
@@ -219,9 +256,9 @@ def link_budget(tx_power_dbm, tx_gain_dbi, rx_gain_dbi, distance_km, frequency):
         'frequency_mhz': frequency / 1e6,
         'wavelength_m': wavelength,
         'eirp_dbm': float(eirp_dbm),
-        'fspl_db': float(fspl_db),
-        'rx_power_dbm': float(rx_power_dbm),
-        'estimated_snr_db': float(snr_db)
+        'fspl_db': fspl_db,
+        'rx_power_dbm': rx_power_dbm,
+        'estimated_snr_db': snr_db
     }
     
     if rx_power_dbm < -100:
@@ -238,22 +275,21 @@ def link_budget(tx_power_dbm, tx_gain_dbi, rx_gain_dbi, distance_km, frequency):
 def get_rf_constants():
     return RF_CONSTANTS
 
+_BAND_EDGES_MHZ = (0.003, 0.03, 0.3, 3, 30, 300, 3000, 30000, 300000)
+_BANDS = tuple(
+    {'band': abbr, 'name': name, 'range_mhz': f'{low}-{high}'}
+    for (abbr, name), low, high in zip(
+        [('VLF', 'Very Low Frequency'), ('LF', 'Low Frequency'), ('MF', 'Medium Frequency'),
+         ('HF', 'High Frequency'), ('VHF', 'Very High Frequency'), ('UHF', 'Ultra High Frequency'),
+         ('SHF', 'Super High Frequency'), ('EHF', 'Extremely High Frequency')],
+        _BAND_EDGES_MHZ, _BAND_EDGES_MHZ[1:]
+    )
+)
+_UNKNOWN_BAND = {'band': 'Unknown', 'name': 'Outside defined bands', 'range_mhz': 'N/A'}
+
+@lru_cache(maxsize=256)
 def get_band_info(frequency):
-    freq_mhz = frequency / 1e6
-    
-    bands = [
-        (0.003, 0.03, 'VLF', 'Very Low Frequency'),
-        (0.03, 0.3, 'LF', 'Low Frequency'),
-        (0.3, 3, 'MF', 'Medium Frequency'),
-        (3, 30, 'HF', 'High Frequency'),
-        (30, 300, 'VHF', 'Very High Frequency'),
-        (300, 3000, 'UHF', 'Ultra High Frequency'),
-        (3000, 30000, 'SHF', 'Super High Frequency'),
-        (30000, 300000, 'EHF', 'Extremely High Frequency')
-    ]
-    
-    for low, high, abbr, name in bands:
-        if low <= freq_mhz < high:
-            return {'band': abbr, 'name': name, 'range_mhz': f'{low}-{high}'}
-    
-    return {'band': 'Unknown', 'name': 'Outside defined bands', 'range_mhz': 'N/A'}
+    i = bisect_right(_BAND_EDGES_MHZ, frequency / 1e6) - 1
+    if 0 <= i < len(_BANDS):
+        return _BANDS[i]
+    return _UNKNOWN_BAND
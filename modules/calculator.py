@@ -1,6 +1,6 @@
 import numpy as np
 import math
-from database import save_calculation
+from database import save_calculation, batched_saves
 
 ENGINEERING_CONSTANTS = {
     'speed_of_light': 299792458,
@@ -26,23 +26,28 @@ def convert_unit(value, from_prefix, to_prefix):
 def ohms_law(voltage=None, current=None, resistance=None):
     warnings = []
     result = {}
+    computed_current = 0
     
     if voltage is not None and current is not None:
+        power = voltage * current
         result['resistance'] = voltage / current if current != 0 else float('inf')
-        result['power'] = voltage * current
+        result['power'] = power
     elif voltage is not None and resistance is not None:
-        result['current'] = voltage / resistance if resistance != 0 else float('inf')
-        result['power'] = (voltage ** 2) / resistance if resistance != 0 else float('inf')
+        computed_current = voltage / resistance if resistance != 0 else float('inf')
+        power = (voltage ** 2) / resistance if resistance != 0 else float('inf')
+        result['current'] = computed_current
+        result['power'] = power
     elif current is not None and resistance is not None:
+        power = (current ** 2) * resistance
         result['voltage'] = current * resistance
-        result['power'] = (current ** 2) * resistance
+        result['power'] = power
     else:
         warnings.append("Please provide at least two values")
         return result, warnings
     
-    if result.get('power', 0) > 100:
+    if power > 100:
         warnings.append("High power dissipation! Consider heat management.")
-    if result.get('current', 0) > 10:
+    if computed_current > 10:
         warnings.append("High current! Ensure proper wire gauge.")
     
     save_calculation('ohms_law', 
@@ -136,8 +141,9 @@ def rlc_circuit(resistance, inductance, capacitance, frequency=None):
         result['response_type'] = 'Overdamped'
     
     if frequency:
-        xl = 2 * math.pi * frequency * inductance
-        xc = 1 / (2 * math.pi * frequency * capacitance)
+        omega = 2 * math.pi * frequency
+        xl = omega * inductance
+        xc = 1 / (omega * capacitance)
         x_total = xl - xc
         impedance = math.sqrt(resistance**2 + x_total**2)
         phase = math.degrees(math.atan(x_total / resistance)) if resistance != 0 else 90
@@ -272,22 +278,24 @@ def power_rating_check(voltage, current, rated_power, derating_factor=0.8):
 
 def what_if_analysis(base_params, param_to_vary, variation_range, calculation_func):
     results = []
-    for variation in variation_range:
-        params = base_params.copy()
-        params[param_to_vary] = variation
-        result, _ = calculation_func(**params)
-        results.append({'param_value': variation, 'result': result})
+    with batched_saves():
+        for variation in variation_range:
+            params = base_params.copy()
+            params[param_to_vary] = variation
+            result, _ = calculation_func(**params)
+            results.append({'param_value': variation, 'result': result})
     return results
 
 def series_resistance(resistances):
-    total = sum(resistances)
-    return {'total_resistance': total, 'count': len(resistances)}
+    arr = np.asarray(resistances)
+    return {'total_resistance': arr.sum().item(), 'count': arr.size}
 
 def parallel_resistance(resistances):
-    if 0 in resistances:
+    arr = np.asarray(resistances, dtype=np.float64)
+    if (arr == 0).any():
         return {'total_resistance': 0, 'warning': 'Short circuit detected'}
-    total = 1 / sum(1/r for r in resistances)
-    return {'total_resistance': total, 'count': len(resistances)}
+    total = 1 / float(np.reciprocal(arr).sum())
+    return {'total_resistance': total, 'count': arr.size}
 
 def voltage_divider(vin, r1, r2):
     vout = vin * r2 / (r1 + r2)
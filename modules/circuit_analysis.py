@@ -11,16 +11,10 @@ def dc_analysis(voltage_sources, current_sources, resistances, connections):
     
     circuit_current = total_voltage / total_resistance if total_resistance > 0 else 0
     
-    node_voltages = []
-    cumulative_drop = 0
-    for r in resistances:
-        voltage_drop = circuit_current * r
-        cumulative_drop += voltage_drop
-        node_voltages.append(total_voltage - cumulative_drop)
-    
-    power_dissipated = []
-    for r in resistances:
-        power_dissipated.append(circuit_current**2 * r)
+    r = np.asarray(resistances, dtype=np.float64)
+    node_voltages = total_voltage - np.cumsum(circuit_current * r)
+    power_dissipated = circuit_current**2 * r
+    total_power = float(power_dissipated.sum())
     
     result = {
         'total_voltage': total_voltage,
@@ -28,12 +22,12 @@ def dc_analysis(voltage_sources, current_sources, resistances, connections):
         'circuit_current': circuit_current,
         'node_voltages': node_voltages,
         'power_dissipated': power_dissipated,
-        'total_power': sum(power_dissipated)
+        'total_power': total_power
     }
     
     if circuit_current > 10:
         warnings.append("High current flow detected")
-    if sum(power_dissipated) > 100:
+    if total_power > 100:
         warnings.append("High power dissipation - consider thermal management")
     
     save_calculation('dc_analysis',
@@ -92,31 +86,32 @@ def ac_analysis(voltage_amplitude, frequency, resistance, inductance=0, capacita
     return result, warnings
 
 def frequency_response(resistance, inductance, capacitance, freq_start=1, freq_end=1e6, points=100):
-    frequencies = np.logspace(np.log10(freq_start), np.log10(freq_end), points)
+    frequencies = np.logspace(math.log10(freq_start), math.log10(freq_end), points)
     
-    gains = []
-    phases = []
-    impedances = []
+    # Work in place on a few preallocated arrays instead of one temporary per step
+    omega = 2 * math.pi * frequencies
+    x_net = omega * inductance if inductance > 0 else np.zeros_like(omega)
+    if capacitance > 0:
+        omega *= capacitance
+        x_net -= np.reciprocal(omega, out=omega)
     
-    for freq in frequencies:
-        omega = 2 * math.pi * freq
-        xl = omega * inductance if inductance > 0 else 0
-        xc = 1 / (omega * capacitance) if capacitance > 0 else 0
-        x_net = xl - xc
-        
-        impedance = math.sqrt(resistance**2 + x_net**2)
-        impedances.append(impedance)
-        
-        gain_db = 20 * np.log10(resistance / impedance) if impedance > 0 else 0
-        gains.append(gain_db)
-        
-        phase = math.degrees(math.atan2(-x_net, resistance))
-        phases.append(phase)
+    impedances = np.hypot(resistance, x_net)
+    
+    gains = np.zeros_like(impedances)
+    nonzero = impedances > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(resistance, impedances, out=gains, where=nonzero)
+        np.log10(gains, out=gains, where=nonzero)
+    gains *= 20
+    
+    phases = np.negative(x_net, out=x_net)
+    np.arctan2(phases, resistance, out=phases)
+    np.degrees(phases, out=phases)
     
     resonant_freq = 1 / (2 * math.pi * math.sqrt(inductance * capacitance)) if inductance > 0 and capacitance > 0 else None
     
     result = {
-        'frequencies': frequencies.tolist(),
+        'frequencies': frequencies,
         'gains_db': gains,
         'phases': phases,
         'impedances': impedances,
@@ -163,27 +158,63 @@ def efficiency_analysis(input_power, output_power, losses=None):
     
     return result, warnings
 
-def comparative_analysis(circuits):
-    comparison = []
+def _ac_analysis_batch(voltage_amplitude, frequency, resistance, inductance, capacitance):
+    omega = 2 * math.pi * frequency
+    
+    xl = np.where(inductance > 0, omega * inductance, 0.0)
+    xc = np.zeros_like(omega)
+    np.divide(1, omega * capacitance, out=xc, where=capacitance > 0)
+    x_net = xl - xc
+    
+    impedance = np.sqrt(resistance**2 + x_net**2)
+    phase_angle = np.degrees(np.arctan2(x_net, resistance))
     
-    for i, circuit in enumerate(circuits):
-        result, warnings = ac_analysis(**circuit)
-        comparison.append({
+    current_amplitude = np.zeros_like(impedance)
+    np.divide(voltage_amplitude, impedance, out=current_amplitude, where=impedance > 0)
+    power_apparent = voltage_amplitude * current_amplitude / 2
+    phase_rad = np.radians(phase_angle)
+    
+    return {
+        'net_reactance': x_net,
+        'impedance': impedance,
+        'phase_angle': phase_angle,
+        'current_amplitude': current_amplitude,
+        'power_apparent': power_apparent,
+        'power_real': power_apparent * np.cos(phase_rad),
+        'power_reactive': power_apparent * np.sin(phase_rad),
+        'power_factor': np.cos(phase_rad)
+    }
+
+def comparative_analysis(circuits):
+    def column(name, default=0):
+        return np.array([c.get(name, default) for c in circuits], dtype=np.float64)
+    
+    batch = _ac_analysis_batch(
+        column('voltage_amplitude'), column('frequency'), column('resistance'),
+        column('inductance'), column('capacitance')
+    )
+    x_net = batch['net_reactance']
+    circuit_types = np.where(x_net > 0, 'inductive', np.where(x_net < 0, 'capacitive', 'resistive'))
+    
+    comparison = [
+        {
             'circuit_id': i + 1,
             'parameters': circuit,
-            'impedance': result['impedance'],
-            'power_factor': result['power_factor'],
-            'efficiency': result.get('efficiency', 'N/A'),
-            'phase_angle': result['phase_angle'],
-            'circuit_type': result['circuit_type']
-        })
-    
-    best_pf = max(comparison, key=lambda x: x['power_factor'])
-    lowest_impedance = min(comparison, key=lambda x: x['impedance'])
+            'impedance': impedance,
+            'power_factor': power_factor,
+            'efficiency': 'N/A',
+            'phase_angle': phase_angle,
+            'circuit_type': circuit_type
+        }
+        for i, (circuit, impedance, power_factor, phase_angle, circuit_type) in enumerate(zip(
+            circuits, batch['impedance'].tolist(), batch['power_factor'].tolist(),
+            batch['phase_angle'].tolist(), circuit_types.tolist()
+        ))
+    ]
     
     conclusion = {
-        'best_power_factor': best_pf['circuit_id'],
-        'lowest_impedance': lowest_impedance['circuit_id'],
+        'best_power_factor': int(np.argmax(batch['power_factor'])) + 1,
+        'lowest_impedance': int(np.argmin(batch['impedance'])) + 1,
         'comparison_data': comparison
     }
     
@@ -3,55 +3,94 @@ import pandas as pd
 from database import save_energy_data, get_energy_data
 import os
 
-def analyze_csv(file_path, time_column='time', power_column='power', cost_per_kwh=0.12):
+CSV_CHUNK_ROWS = 1_000_000
+
+def analyze_csv(csv_file, time_column='time', power_column='power', cost_per_kwh=0.12, filename=None):
     warnings = []
     
+    if filename is None:
+        filename = os.path.basename(csv_file) if isinstance(csv_file, str) else 'upload.csv'
+    
+    # Sniff the header first so only the power column has to be parsed
+    start = None if isinstance(csv_file, str) else csv_file.tell()
     try:
-        df = pd.read_csv(file_path)
+        columns = pd.read_csv(csv_file, nrows=0).columns
     except Exception as e:
         return {'error': str(e)}, ['Failed to read CSV file']
     
-    if time_column not in df.columns:
-        for col in df.columns:
+    if time_column not in columns:
+        for col in columns:
             if 'time' in col.lower() or 'date' in col.lower():
                 time_column = col
                 break
     
-    if power_column not in df.columns:
-        for col in df.columns:
+    if power_column not in columns:
+        for col in columns:
             if 'power' in col.lower() or 'watt' in col.lower() or 'kw' in col.lower():
                 power_column = col
                 break
     
-    if power_column not in df.columns:
+    if power_column not in columns:
         return {'error': 'Power column not found'}, ['Could not identify power data column']
     
-    power_data = df[power_column].dropna()
+    if start is not None:
+        csv_file.seek(start)
+    
+    # Stream the column in chunks and keep running totals, so memory stays
+    # bounded by the chunk size rather than the file size
+    num_readings = 0
+    power_sum = 0.0
+    peak_load = float('-inf')
+    min_load = float('inf')
+    try:
+        # Parsing straight to float64 keeps the reductions on the C path and
+        # fails on the first non-numeric cell instead of building object columns
+        with pd.read_csv(csv_file, usecols=[power_column], dtype={power_column: np.float64},
+                         chunksize=CSV_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                power_data = chunk[power_column].to_numpy()
+                # Only pay for the filtered copy when the chunk actually has gaps
+                missing = np.isnan(power_data)
+                if missing.any():
+                    power_data = power_data[~missing]
+                if power_data.size == 0:
+                    continue
+                num_readings += power_data.size
+                power_sum += power_data.sum()
+                peak_load = max(peak_load, power_data.max())
+                min_load = min(min_load, power_data.min())
+    except pd.errors.ParserError as e:
+        return {'error': str(e)}, ['Failed to read CSV file']
+    except (TypeError, ValueError):
+        return {'error': 'Power column is not numeric'}, ['Could not parse power data column']
+    except Exception as e:
+        return {'error': str(e)}, ['Failed to read CSV file']
+    
+    if num_readings == 0:
+        return {'error': 'No power readings found'}, ['Power data column is empty']
     
-    if len(power_data) > 1:
-        time_interval_hours = 1 / len(power_data) * 24
+    if num_readings > 1:
+        time_interval_hours = 1 / num_readings * 24
     else:
         time_interval_hours = 1
     
-    total_energy_kwh = np.sum(power_data) * time_interval_hours / 1000
-    
-    peak_load = np.max(power_data)
-    avg_load = np.mean(power_data)
-    min_load = np.min(power_data)
+    # One sum serves both the energy total and the mean
+    total_energy_kwh = power_sum * time_interval_hours / 1000
+    avg_load = power_sum / num_readings
     
     load_factor = avg_load / peak_load if peak_load > 0 else 0
     
     total_cost = total_energy_kwh * cost_per_kwh
     
     result = {
-        'filename': os.path.basename(file_path),
-        'total_readings': len(power_data),
-        'total_energy_kwh': round(total_energy_kwh, 2),
-        'peak_load_w': round(peak_load, 2),
-        'average_load_w': round(avg_load, 2),
-        'min_load_w': round(min_load, 2),
-        'load_factor': round(load_factor, 3),
-        'estimated_cost': round(total_cost, 2),
+        'filename': filename,
+        'total_readings': num_readings,
+        'total_energy_kwh': round(float(total_energy_kwh), 2),
+        'peak_load_w': round(float(peak_load), 2),
+        'average_load_w': round(float(avg_load), 2),
+        'min_load_w': round(float(min_load), 2),
+        'load_factor': round(float(load_factor), 3),
+        'estimated_cost': round(float(total_cost), 2),
         'cost_per_kwh': cost_per_kwh
     }
     
@@ -70,28 +109,40 @@ def analyze_csv(file_path, time_column='time', power_column='power', cost_per_kw
     
     return result, warnings
 
+PEAK_MIN_DISTANCE = 5
+
+def _find_peaks(data, threshold, min_distance=PEAK_MIN_DISTANCE):
+    # Local maxima above the threshold in one vectorized pass; only the
+    # minimum-spacing rule is sequential, and it runs over candidates alone
+    interior = data[1:-1]
+    candidates = np.flatnonzero((interior > data[:-2]) & (interior > data[2:]) & (interior >= threshold)) + 1
+    if candidates.size < 2 or np.diff(candidates).min() >= min_distance:
+        return candidates
+    
+    kept = []
+    last = -min_distance
+    for i in candidates.tolist():
+        if i - last >= min_distance:
+            kept.append(i)
+            last = i
+    return np.array(kept, dtype=np.intp)
+
 def detect_peaks(power_data, threshold_factor=1.5):
     """Simple peak detection using numpy only"""
-    data = np.array(power_data)
-    mean_power = np.mean(data)
+    data = np.asarray(power_data, dtype=np.float64)
+    mean_power = data.mean()
     threshold = mean_power * threshold_factor
     
-    peaks = []
-    peak_values = []
-    
-    for i in range(1, len(data) - 1):
-        if data[i] > data[i-1] and data[i] > data[i+1] and data[i] >= threshold:
-            if len(peaks) == 0 or i - peaks[-1] >= 5:
-                peaks.append(i)
-                peak_values.append(float(data[i]))
+    peaks = _find_peaks(data, threshold)
+    peak_values = data[peaks]
     
     result = {
-        'num_peaks': len(peaks),
+        'num_peaks': peaks.size,
         'peak_indices': peaks,
         'peak_values': peak_values,
         'threshold_used': threshold,
         'mean_power': mean_power,
-        'max_peak': max(peak_values) if peak_values else 0
+        'max_peak': float(peak_values.max()) if peak_values.size else 0
     }
     
     return result
@@ -162,9 +213,11 @@ def comparative_analysis(datasets):
         name = data.get('name', f'Dataset {i+1}')
         
         if power_data:
-            total_energy = sum(power_data) / 1000
-            peak = max(power_data)
-            avg = sum(power_data) / len(power_data)
+            arr = np.asarray(power_data, dtype=np.float64)
+            power_sum = float(arr.sum())
+            total_energy = power_sum / 1000
+            peak = float(arr.max())
+            avg = power_sum / arr.size
             load_factor = avg / peak if peak > 0 else 0
         else:
             total_energy = data.get('total_energy', 0)
@@ -1,3 +1,5 @@
+from collections import namedtuple
+from functools import lru_cache
 from database import save_calculation
 
 FAULT_RULES = {
@@ -113,19 +115,56 @@ COMPONENT_TESTS = {
     ]
 }
 
-def diagnose_fault(symptoms):
+_Fault = namedtuple('_Fault', 'symptoms causes symptom_set symptom_count')
+
+# Read-only view of FAULT_RULES for scoring; FAULT_RULES itself stays the public table
+_FAULTS = {
+    fault_type: _Fault(tuple(data['symptoms']), data['causes'], frozenset(data['symptoms']), len(data['symptoms']))
+    for fault_type, data in FAULT_RULES.items()
+}
+
+def _build_symptom_index():
+    index = {}
+    for fault_type, fault in _FAULTS.items():
+        for symptom in fault.symptom_set:
+            index.setdefault(symptom, []).append(fault_type)
+    return index
+
+# Inverted index so a diagnosis only scores the faults that share a symptom
+_SYMPTOM_INDEX = _build_symptom_index()
+_FAULT_ORDER = {fault_type: i for i, fault_type in enumerate(_FAULTS)}
+_ALL_SYMPTOMS = tuple(sorted(_SYMPTOM_INDEX))
+
+# Scoring depends only on the symptom set and the static rule table, so
+# results are shared between calls; callers get a shallow copy to mutate
+@lru_cache(maxsize=1024)
+def _diagnose(symptoms):
     matches = []
     
-    for fault_type, data in FAULT_RULES.items():
-        symptom_matches = set(symptoms) & set(data['symptoms'])
-        if symptom_matches:
-            match_score = len(symptom_matches) / len(data['symptoms'])
-            matches.append({
-                'fault_type': fault_type,
-                'match_score': match_score,
-                'matched_symptoms': list(symptom_matches),
-                'causes': data['causes']
-            })
+    if len(symptoms) == 1:
+        # A lone symptom matches each of its faults exactly once, and the
+        # index already lists them in FAULT_RULES order
+        (symptom,) = symptoms
+        candidates = _SYMPTOM_INDEX.get(symptom, ())
+        matched = {fault_type: [symptom] for fault_type in candidates}
+    else:
+        matched = {}
+        for symptom in symptoms:
+            for fault_type in _SYMPTOM_INDEX.get(symptom, ()):
+                matched.setdefault(fault_type, []).append(symptom)
+        # Score in FAULT_RULES order so ties rank the same as a full scan
+        candidates = sorted(matched, key=_FAULT_ORDER.__getitem__)
+    
+    for fault_type in candidates:
+        fault = _FAULTS[fault_type]
+        symptom_matches = matched[fault_type]
+        match_score = len(symptom_matches) / fault.symptom_count
+        matches.append({
+            'fault_type': fault_type,
+            'match_score': match_score,
+            'matched_symptoms': symptom_matches,
+            'causes': fault.causes
+        })
     
     matches.sort(key=lambda x: x['match_score'], reverse=True)
     
@@ -147,6 +186,11 @@ def diagnose_fault(symptoms):
             'message': 'No matching fault patterns found. Consider detailed inspection.'
         }
     
+    return diagnosis
+
+def diagnose_fault(symptoms):
+    diagnosis = dict(_diagnose(frozenset(symptoms)))
+    
     save_calculation('fault_diagnosis',
         {'symptoms': symptoms},
         {'diagnosis': diagnosis['primary_fault'], 'confidence': diagnosis.get('confidence', 0)},
@@ -209,10 +253,7 @@ def generate_diagnosis_report(symptoms, diagnosis):
     return report
 
 def get_all_symptoms():
-    all_symptoms = set()
-    for data in FAULT_RULES.values():
-        all_symptoms.update(data['symptoms'])
-    return sorted(list(all_symptoms))
+    return list(_ALL_SYMPTOMS)
 
 def get_fault_types():
     return list(FAULT_RULES.keys())
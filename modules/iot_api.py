@@ -1,7 +1,12 @@
-import random
+import csv
+import io
 import time
+import threading
+from dataclasses import dataclass
+from functools import wraps
 from datetime import datetime, timedelta
-from database import save_iot_reading, get_iot_readings
+import numpy as np
+from database import save_iot_reading, save_iot_readings_bulk, get_iot_readings, iter_iot_readings, get_latest_readings_per_sensor
 
 SENSOR_THRESHOLDS = {
     'temperature': {'min': -10, 'max': 50, 'unit': 'C', 'alert_high': 40, 'alert_low': 0},
@@ -23,7 +28,47 @@ SIMULATED_DEVICES = {
     'power_meter_1': {'type': 'power', 'location': 'Building', 'base_value': 3000}
 }
 
+# One generator serves every simulated draw in this module
+_rng = np.random.default_rng()
+
+CACHE_TTL_SECONDS = 1.0
+CACHE_MAXSIZE = 512
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _ttl_cached(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        sensor_id = args[0] if args else kwargs.get('sensor_id')
+        key = (func.__name__, sensor_id, args[1:], tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        entry = _cache.get(key)
+        if entry is not None and now - entry[0] < CACHE_TTL_SECONDS:
+            return entry[1]
+        value = func(*args, **kwargs)
+        with _cache_lock:
+            if len(_cache) >= CACHE_MAXSIZE:
+                _cache.clear()
+            _cache[key] = (now, value)
+        return value
+    return wrapper
+
+def invalidate(sensor_id=None):
+    with _cache_lock:
+        if sensor_id is None:
+            _cache.clear()
+            return
+        for key in [k for k in _cache if k[1] in (sensor_id, None)]:
+            del _cache[key]
+
 def process_sensor_data(sensor_id, value, sensor_type=None):
+    result = _build_reading(sensor_id, value, sensor_type)
+    save_iot_reading(sensor_id, value, result['unit'], result['alert'])
+    invalidate(sensor_id)
+    return result
+
+def _build_reading(sensor_id, value, sensor_type=None):
     if sensor_type is None:
         if sensor_id in SIMULATED_DEVICES:
             sensor_type = SIMULATED_DEVICES[sensor_id]['type']
@@ -44,8 +89,6 @@ def process_sensor_data(sensor_id, value, sensor_type=None):
             alert = 1
             alert_message = f"LOW ALERT: {sensor_id} value {value} below threshold {threshold['alert_low']}"
     
-    save_iot_reading(sensor_id, value, unit, alert)
-    
     result = {
         'sensor_id': sensor_id,
         'value': value,
@@ -59,7 +102,7 @@ def process_sensor_data(sensor_id, value, sensor_type=None):
     
     return result
 
-def get_sensor_history(sensor_id=None, limit=100):
+def read_sensor_history(sensor_id=None, limit=100):
     readings = get_iot_readings(sensor_id, limit)
     
     history = []
@@ -75,14 +118,23 @@ def get_sensor_history(sensor_id=None, limit=100):
     
     return history
 
+# The ETag'd /api/iot/history route reads through read_sensor_history: its
+# tag comes from a live MAX(id), and this cache is only invalidated in the
+# process that did the insert
+get_sensor_history = _ttl_cached(read_sensor_history)
+
 def simulate_sensor_reading(sensor_id=None):
+    sensor_id, value, sensor_type = _simulate_value(sensor_id)
+    return process_sensor_data(sensor_id, value, sensor_type)
+
+def _simulate_value(sensor_id=None):
     if sensor_id and sensor_id in SIMULATED_DEVICES:
         device = SIMULATED_DEVICES[sensor_id]
         sensor_type = device['type']
         base_value = device['base_value']
     else:
         devices = list(SIMULATED_DEVICES.keys())
-        sensor_id = random.choice(devices)
+        sensor_id = devices[_rng.integers(len(devices))]
         device = SIMULATED_DEVICES[sensor_id]
         sensor_type = device['type']
         base_value = device['base_value']
@@ -90,89 +142,174 @@ def simulate_sensor_reading(sensor_id=None):
     threshold = SENSOR_THRESHOLDS.get(sensor_type, {})
     
     variation = base_value * 0.1
-    value = base_value + random.uniform(-variation, variation)
+    value = base_value + float(_rng.uniform(-variation, variation))
     
-    if random.random() < 0.05:
-        if random.random() < 0.5:
+    if _rng.random() < 0.05:
+        if _rng.random() < 0.5:
             value = threshold.get('alert_high', base_value * 2) * 1.1
         else:
             value = threshold.get('alert_low', 0) * 0.9
     
     value = round(value, 2)
     
-    return process_sensor_data(sensor_id, value, sensor_type)
+    return sensor_id, value, sensor_type
+
+# Per-device columns for batch simulation, laid out once in device order
+_SIM_SENSOR_IDS = list(SIMULATED_DEVICES)
+_SIM_SENSOR_TYPES = [SIMULATED_DEVICES[s]['type'] for s in _SIM_SENSOR_IDS]
+_SIM_THRESHOLDS = [SENSOR_THRESHOLDS.get(t, {}) for t in _SIM_SENSOR_TYPES]
+_SIM_UNITS = [t.get('unit', 'units') for t in _SIM_THRESHOLDS]
+_SIM_BASE_VALUES = np.array([SIMULATED_DEVICES[s]['base_value'] for s in _SIM_SENSOR_IDS], dtype=np.float64)
+_SIM_VARIATIONS = _SIM_BASE_VALUES * 0.1
+_SIM_ALERT_HIGH = np.array([t.get('alert_high', np.inf) for t in _SIM_THRESHOLDS])
+_SIM_ALERT_LOW = np.array([t.get('alert_low', -np.inf) for t in _SIM_THRESHOLDS])
+_SIM_SPIKE_HIGH = np.array([t.get('alert_high', b * 2) * 1.1 for t, b in zip(_SIM_THRESHOLDS, _SIM_BASE_VALUES.tolist())])
+_SIM_SPIKE_LOW = np.array([t.get('alert_low', 0) * 0.9 for t in _SIM_THRESHOLDS])
+
+@dataclass
+class _SimBatch:
+    """Simulated readings as flat, reading-major parallel columns."""
+    values: np.ndarray
+    sensor_idx: np.ndarray
+    high: np.ndarray
+    alert: np.ndarray
+    
+    def rows(self):
+        return zip(
+            map(_SIM_SENSOR_IDS.__getitem__, self.sensor_idx.tolist()),
+            self.values.tolist(),
+            map(_SIM_UNITS.__getitem__, self.sensor_idx.tolist()),
+            self.alert.astype(int).tolist()
+        )
+
+def _simulate_batch(num_readings):
+    # A non-positive count is an empty batch, as the per-reading loop gave
+    num_readings = max(0, num_readings)
+    shape = (num_readings, len(_SIM_SENSOR_IDS))
+    values = _SIM_BASE_VALUES + _rng.uniform(-_SIM_VARIATIONS, _SIM_VARIATIONS, shape)
+    
+    spikes = _rng.random(shape) < 0.05
+    high_spikes = _rng.random(shape) < 0.5
+    values = np.where(spikes & high_spikes, _SIM_SPIKE_HIGH, values)
+    values = np.where(spikes & ~high_spikes, _SIM_SPIKE_LOW, values)
+    values = np.round(values, 2)
+    
+    high = values >= _SIM_ALERT_HIGH
+    low = ~high & (values <= _SIM_ALERT_LOW)
+    
+    return _SimBatch(
+        values=values.ravel(),
+        sensor_idx=np.tile(np.arange(shape[1], dtype=np.int16), num_readings),
+        high=high.ravel(),
+        alert=(high | low).ravel()
+    )
 
 def simulate_batch_readings(num_readings=10, interval_seconds=1):
-    readings = []
+    batch = _simulate_batch(num_readings)
+    save_iot_readings_bulk(batch.rows())
+    invalidate()
     
-    for _ in range(num_readings):
-        for sensor_id in SIMULATED_DEVICES.keys():
-            reading = simulate_sensor_reading(sensor_id)
-            readings.append(reading)
+    # The batch is inserted in one transaction, so every reading shares one stamp
+    timestamp = datetime.now().isoformat()
+    readings = []
+    for value, j, high, alert in zip(batch.values.tolist(), batch.sensor_idx.tolist(),
+                                     batch.high.tolist(), batch.alert.tolist()):
+        sensor_id = _SIM_SENSOR_IDS[j]
+        alert_message = None
+        if high:
+            alert_message = f"HIGH ALERT: {sensor_id} value {value} exceeds threshold {_SIM_THRESHOLDS[j]['alert_high']}"
+        elif alert:
+            alert_message = f"LOW ALERT: {sensor_id} value {value} below threshold {_SIM_THRESHOLDS[j]['alert_low']}"
+        
+        readings.append({
+            'sensor_id': sensor_id,
+            'value': value,
+            'unit': _SIM_UNITS[j],
+            'sensor_type': _SIM_SENSOR_TYPES[j],
+            'timestamp': timestamp,
+            'alert': int(alert),
+            'alert_message': alert_message,
+            'status': 'recorded'
+        })
     
     return readings
 
+@_ttl_cached
 def get_device_status():
+    latest = {row['sensor']: dict(row) for row in get_latest_readings_per_sensor(SIMULATED_DEVICES)}
     status = []
     
     for device_id, device_info in SIMULATED_DEVICES.items():
-        history = get_sensor_history(device_id, limit=1)
+        last_reading = latest.get(device_id)
         
         device_status = {
             'device_id': device_id,
             'type': device_info['type'],
             'location': device_info['location'],
-            'last_reading': history[0] if history else None,
-            'status': 'online' if history else 'no_data'
+            'last_reading': last_reading,
+            'status': 'online' if last_reading else 'no_data'
         }
         status.append(device_status)
     
     return status
 
+# Alerts above 1.2x the device's high threshold are reported as high severity
+_SEVERITY_CUTOFFS = {
+    device_id: SENSOR_THRESHOLDS.get(device['type'], {}).get('alert_high', float('inf')) * 1.2
+    for device_id, device in SIMULATED_DEVICES.items()
+}
+
+@_ttl_cached
 def check_alerts(sensor_id=None):
-    readings = get_iot_readings(sensor_id, limit=100)
+    readings = [r for r in get_iot_readings(sensor_id, limit=100) if r['alert']]
+    if not readings:
+        return []
+    
+    values = np.array([r['value'] for r in readings], dtype=np.float64)
+    cutoffs = np.array([_SEVERITY_CUTOFFS.get(r['sensor'], np.inf) for r in readings])
+    severities = np.where(np.abs(values) > cutoffs, 'high', 'medium').tolist()
     
     alerts = []
-    for reading in readings:
-        if reading['alert']:
-            alerts.append({
-                'sensor': reading['sensor'],
-                'value': reading['value'],
-                'unit': reading['unit'],
-                'timestamp': reading['timestamp'],
-                'severity': 'high' if abs(reading['value']) > SENSOR_THRESHOLDS.get(
-                    SIMULATED_DEVICES.get(reading['sensor'], {}).get('type', ''), {}
-                ).get('alert_high', float('inf')) * 1.2 else 'medium'
-            })
+    for reading, severity in zip(readings, severities):
+        alerts.append({
+            'sensor': reading['sensor'],
+            'value': reading['value'],
+            'unit': reading['unit'],
+            'timestamp': reading['timestamp'],
+            'severity': severity
+        })
     
     return alerts
 
+@_ttl_cached
 def get_statistics(sensor_id, hours=24):
     readings = get_iot_readings(sensor_id, limit=1000)
     
     if not readings:
         return {'error': 'No data available'}
     
-    values = [r['value'] for r in readings]
+    values_array = np.asarray([r['value'] for r in readings], dtype=np.float64)
+    n = values_array.size
     
-    import numpy as np
-    values_array = np.array(values)
+    # Reuse the mean for the deviation instead of letting np.std recompute it
+    mean = values_array.sum() / n
+    deviation = values_array - mean
     
     stats = {
         'sensor_id': sensor_id,
         'period_hours': hours,
-        'num_readings': len(values),
-        'min': float(np.min(values_array)),
-        'max': float(np.max(values_array)),
-        'mean': float(np.mean(values_array)),
-        'std': float(np.std(values_array)),
+        'num_readings': n,
+        'min': float(values_array.min()),
+        'max': float(values_array.max()),
+        'mean': float(mean),
+        'std': float(np.sqrt(deviation.dot(deviation) / n)),
         'median': float(np.median(values_array))
     }
     
     return stats
 
-def export_sensor_data(sensor_id=None, format='json'):
-    readings = get_sensor_history(sensor_id, limit=1000)
+def export_sensor_data(sensor_id=None, format='json', limit=1000):
+    readings = get_sensor_history(sensor_id, limit=limit)
     
     if format == 'json':
         return readings
@@ -181,16 +318,33 @@ def export_sensor_data(sensor_id=None, format='json'):
             return "No data"
         
         headers = ['id', 'sensor', 'value', 'unit', 'alert', 'timestamp']
-        csv_lines = [','.join(headers)]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(headers)
+        writer.writerows([reading.get(h, '') for h in headers] for reading in readings)
         
-        for reading in readings:
-            row = [str(reading.get(h, '')) for h in headers]
-            csv_lines.append(','.join(row))
-        
-        return '\n'.join(csv_lines)
+        return buffer.getvalue()
     
     return readings
 
+def stream_sensor_csv(sensor_id=None, limit=1000, batch_size=500):
+    cursor = iter_iot_readings(sensor_id, limit)
+    rows = cursor.fetchmany(batch_size)
+    if not rows:
+        yield "No data"
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow([column[0] for column in cursor.description])
+    
+    while rows:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        rows = cursor.fetchmany(batch_size)
+
 def get_sensor_thresholds():
     return SENSOR_THRESHOLDS
 
@@ -1,34 +1,73 @@
 import numpy as np
 import math
+import scipy.fft
+import scipy.signal
+from functools import lru_cache
 from database import save_calculation
 
+# Each waveform writes its unit-amplitude shape into one fresh buffer, in place
+def _phase_angle(t, frequency, phase):
+    x = t * (2 * np.pi * frequency)
+    x += math.radians(phase)
+    return x
+
+def _sine_wave(t, frequency, phase):
+    x = _phase_angle(t, frequency, phase)
+    return np.sin(x, out=x)
+
+def _cosine_wave(t, frequency, phase):
+    x = _phase_angle(t, frequency, phase)
+    return np.cos(x, out=x)
+
+def _square_wave(t, frequency, phase):
+    x = _sine_wave(t, frequency, phase)
+    return np.sign(x, out=x)
+
+def _sawtooth_wave(t, frequency, phase):
+    x = t * frequency
+    x += phase/360
+    np.mod(x, 1, out=x)
+    x *= 2
+    x -= 1
+    return x
+
+def _triangle_wave(t, frequency, phase):
+    x = _sawtooth_wave(t, frequency, phase)
+    np.abs(x, out=x)
+    x *= 2
+    x -= 1
+    return x
+
+WAVEFORMS = {
+    'sine': _sine_wave,
+    'cosine': _cosine_wave,
+    'square': _square_wave,
+    'sawtooth': _sawtooth_wave,
+    'triangle': _triangle_wave
+}
+
 def generate_signal(signal_type, frequency, amplitude, duration, sample_rate=10000, phase=0, dc_offset=0):
     t = np.linspace(0, duration, int(sample_rate * duration))
     
-    if signal_type == 'sine':
-        signal = amplitude * np.sin(2 * np.pi * frequency * t + np.radians(phase)) + dc_offset
-    elif signal_type == 'cosine':
-        signal = amplitude * np.cos(2 * np.pi * frequency * t + np.radians(phase)) + dc_offset
-    elif signal_type == 'square':
-        signal = amplitude * np.sign(np.sin(2 * np.pi * frequency * t + np.radians(phase))) + dc_offset
-    elif signal_type == 'sawtooth':
-        signal = amplitude * (2 * ((frequency * t + phase/360) % 1) - 1) + dc_offset
-    elif signal_type == 'triangle':
-        signal = amplitude * (2 * np.abs(2 * ((frequency * t + phase/360) % 1) - 1) - 1) + dc_offset
-    else:
+    waveform = WAVEFORMS.get(signal_type)
+    if waveform is None:
         signal = np.zeros_like(t)
         signal_type = 'unknown'
+    else:
+        signal = waveform(t, frequency, phase)
+        signal *= amplitude
+        signal += dc_offset
     
     result = {
-        'time': t.tolist(),
-        'signal': signal.tolist(),
+        'time': t,
+        'signal': signal,
         'signal_type': signal_type,
         'frequency': frequency,
         'amplitude': amplitude,
         'sample_rate': sample_rate,
         'duration': duration,
-        'rms': float(np.sqrt(np.mean(signal**2))),
-        'peak_to_peak': float(np.max(signal) - np.min(signal))
+        'rms': math.sqrt(signal.dot(signal) / signal.size),
+        'peak_to_peak': float(np.ptp(signal))
     }
     
     save_calculation('signal_generator',
@@ -37,29 +76,44 @@ def generate_signal(signal_type, frequency, amplitude, duration, sample_rate=100
     
     return result
 
-def compute_fft(signal_data, sample_rate):
-    signal = np.array(signal_data)
-    n = len(signal)
+@lru_cache(maxsize=16)
+def _hanning(n):
+    window = np.hanning(n)
+    window.setflags(write=False)
+    return window
+
+def _compute_fft_arrays(signal_data, sample_rate, workers=None):
+    # np.array always copies, so the window can be applied in place
+    signal_windowed = np.array(signal_data, dtype=np.float64)
+    n = len(signal_windowed)
+    signal_windowed *= _hanning(n)
     
-    signal_windowed = signal * np.hanning(n)
+    # Real input only needs the half spectrum; keep the first n//2 bins as before
+    fft_result = scipy.fft.rfft(signal_windowed, workers=workers)[:n//2]
+    positive_freqs = scipy.fft.rfftfreq(n, 1/sample_rate)[:n//2]
     
-    fft_result = np.fft.fft(signal_windowed)
-    frequencies = np.fft.fftfreq(n, 1/sample_rate)
+    # Scale and convert in place so each output is a single allocation
+    magnitude = np.abs(fft_result)
+    magnitude *= 2 / n
     
-    positive_freqs = frequencies[:n//2]
-    magnitude = np.abs(fft_result[:n//2]) * 2 / n
-    phase = np.angle(fft_result[:n//2], deg=True)
+    magnitude_db = magnitude + 1e-10
+    np.log10(magnitude_db, out=magnitude_db)
+    magnitude_db *= 20
     
-    magnitude_db = 20 * np.log10(magnitude + 1e-10)
+    return positive_freqs, fft_result, magnitude, magnitude_db
+
+def compute_fft(signal_data, sample_rate, workers=None):
+    positive_freqs, fft_result, magnitude, magnitude_db = _compute_fft_arrays(signal_data, sample_rate, workers)
+    phase = np.angle(fft_result, deg=True)
     
     dominant_idx = np.argmax(magnitude[1:]) + 1
     dominant_freq = positive_freqs[dominant_idx]
     
     result = {
-        'frequencies': positive_freqs.tolist(),
-        'magnitude': magnitude.tolist(),
-        'magnitude_db': magnitude_db.tolist(),
-        'phase': phase.tolist(),
+        'frequencies': positive_freqs,
+        'magnitude': magnitude,
+        'magnitude_db': magnitude_db,
+        'phase': phase,
         'dominant_frequency': float(dominant_freq),
         'dominant_magnitude': float(magnitude[dominant_idx]),
         'dc_component': float(magnitude[0])
@@ -67,59 +121,80 @@ def compute_fft(signal_data, sample_rate):
     
     return result
 
+# Paul Kellet's pinking filter: parallel one-pole sections (pole, gain) plus a
+# direct and a one-sample-delayed white term
+_PINK_POLES = (
+    (0.99886, 0.0555179),
+    (0.99332, 0.0750759),
+    (0.96900, 0.1538520),
+    (0.86650, 0.3104856),
+    (0.55000, 0.5329522),
+    (-0.7616, -0.0168980),
+)
+_PINK_DIRECT_GAIN = 0.5362
+_PINK_DELAYED_GAIN = 0.115926
+
+def _pink_filter(white_noise):
+    pink = white_noise * _PINK_DIRECT_GAIN
+    pink[1:] += white_noise[:-1] * _PINK_DELAYED_GAIN
+    for pole, gain in _PINK_POLES:
+        pink += scipy.signal.lfilter([gain], [1, -pole], white_noise)
+    # Keep the noise zero-mean so its power is all fluctuation
+    pink -= pink.mean()
+    return pink
+
 def add_noise(signal_data, noise_type='gaussian', snr_db=20):
-    signal = np.array(signal_data)
-    signal_power = np.mean(signal**2)
+    # np.array copies, so the noise can later be mixed into this buffer in place
+    signal = np.array(signal_data, dtype=np.float64)
+    n = len(signal)
+    signal_power = signal.dot(signal) / n
     
     snr_linear = 10**(snr_db/10)
     noise_power = signal_power / snr_linear
     
     if noise_type == 'gaussian':
-        noise = np.random.normal(0, np.sqrt(noise_power), len(signal))
+        noise = np.random.normal(0, np.sqrt(noise_power), n)
     elif noise_type == 'uniform':
-        noise = np.random.uniform(-np.sqrt(3*noise_power), np.sqrt(3*noise_power), len(signal))
+        noise = np.random.uniform(-np.sqrt(3*noise_power), np.sqrt(3*noise_power), n)
     elif noise_type == 'pink':
-        white_noise = np.random.normal(0, 1, len(signal))
-        fft_white = np.fft.fft(white_noise)
-        frequencies = np.fft.fftfreq(len(white_noise))
-        frequencies[0] = 1e-10
-        pink_filter = 1 / np.sqrt(np.abs(frequencies))
-        pink_fft = fft_white * pink_filter
-        noise = np.real(np.fft.ifft(pink_fft))
-        noise = noise * np.sqrt(noise_power) / np.std(noise)
+        white_noise = np.random.normal(0, 1, n)
+        noise = _pink_filter(white_noise)
+        # The pink noise is zero-mean, so its mean square is its variance
+        noise *= np.sqrt(noise_power / (noise.dot(noise) / n))
     else:
         noise = np.zeros_like(signal)
     
-    noisy_signal = signal + noise
+    actual_noise_power = noise.dot(noise) / n
+    actual_snr = 10 * np.log10(signal_power / actual_noise_power) if actual_noise_power > 0 else float('inf')
     
-    actual_snr = 10 * np.log10(signal_power / np.mean(noise**2)) if np.mean(noise**2) > 0 else float('inf')
+    noisy_signal = signal
+    noisy_signal += noise
     
     result = {
-        'noisy_signal': noisy_signal.tolist(),
-        'noise': noise.tolist(),
+        'noisy_signal': noisy_signal,
+        'noise': noise,
         'noise_type': noise_type,
         'target_snr_db': snr_db,
         'actual_snr_db': float(actual_snr),
-        'noise_rms': float(np.sqrt(np.mean(noise**2)))
+        'noise_rms': float(np.sqrt(actual_noise_power))
     }
     
     return result
 
 def bandwidth_analysis(signal_data, sample_rate, threshold_db=-3):
-    fft_result = compute_fft(signal_data, sample_rate)
-    
-    magnitude_db = np.array(fft_result['magnitude_db'])
-    frequencies = np.array(fft_result['frequencies'])
+    # Only the dB spectrum is needed, so skip the phase and summary fields
+    frequencies, _, _, magnitude_db = _compute_fft_arrays(signal_data, sample_rate)
     
     max_magnitude = np.max(magnitude_db)
     threshold = max_magnitude + threshold_db
     
-    above_threshold = magnitude_db >= threshold
+    # frequencies is ascending, so the band edges are the first and last bins
+    # at or above the threshold; no masked copy of the frequencies is needed
+    above = np.flatnonzero(magnitude_db >= threshold)
     
-    if np.any(above_threshold):
-        freq_above = frequencies[above_threshold]
-        lower_freq = float(np.min(freq_above))
-        upper_freq = float(np.max(freq_above))
+    if above.size:
+        lower_freq = float(frequencies[above[0]])
+        upper_freq = float(frequencies[above[-1]])
         bandwidth = upper_freq - lower_freq
         center_freq = (upper_freq + lower_freq) / 2
     else:
@@ -150,6 +225,26 @@ def _butter_lowpass_coeffs(cutoff, fs, order=4):
     n = max(1, int(1.0 / normalized_cutoff))
     return n
 
+_FILTER_TYPES = ('lowpass', 'highpass', 'bandpass', 'bandstop')
+
+@lru_cache(maxsize=64)
+def _filter_mask(n, sample_rate, filter_type, cutoff):
+    # The masks depend only on |f|, so the half spectrum of the real signal
+    # carries everything and irfft rebuilds the real output directly
+    freq = scipy.fft.rfftfreq(n, 1/sample_rate)
+    
+    if filter_type == 'lowpass':
+        mask = freq <= cutoff
+    elif filter_type == 'highpass':
+        mask = freq >= cutoff
+    elif filter_type == 'bandpass':
+        mask = (freq >= cutoff[0]) & (freq <= cutoff[1])
+    else:
+        mask = (freq <= cutoff[0]) | (freq >= cutoff[1])
+    
+    mask.setflags(write=False)
+    return mask
+
 def filter_signal(signal_data, sample_rate, filter_type, cutoff_freq, order=4):
     signal = np.array(signal_data)
     nyquist = sample_rate / 2
@@ -172,31 +267,23 @@ def filter_signal(signal_data, sample_rate, filter_type, cutoff_freq, order=4):
         }
     
     n = len(signal)
-    freq = np.fft.fftfreq(n, 1/sample_rate)
-    fft_signal = np.fft.fft(signal)
-    
-    if filter_type == 'lowpass':
-        mask = np.abs(freq) <= cutoff_freq
-    elif filter_type == 'highpass':
-        mask = np.abs(freq) >= cutoff_freq
-    elif filter_type == 'bandpass':
-        if isinstance(cutoff_freq, (list, tuple)) and len(cutoff_freq) == 2:
-            mask = (np.abs(freq) >= cutoff_freq[0]) & (np.abs(freq) <= cutoff_freq[1])
-        else:
-            return {'filtered_signal': signal_data, 'error': 'Bandpass requires two cutoff frequencies'}
-    elif filter_type == 'bandstop':
-        if isinstance(cutoff_freq, (list, tuple)) and len(cutoff_freq) == 2:
-            mask = (np.abs(freq) <= cutoff_freq[0]) | (np.abs(freq) >= cutoff_freq[1])
-        else:
-            return {'filtered_signal': signal_data, 'error': 'Bandstop requires two cutoff frequencies'}
-    else:
+    band = isinstance(cutoff_freq, (list, tuple)) and len(cutoff_freq) == 2
+    if filter_type == 'bandpass' and not band:
+        return {'filtered_signal': signal_data, 'error': 'Bandpass requires two cutoff frequencies'}
+    if filter_type == 'bandstop' and not band:
+        return {'filtered_signal': signal_data, 'error': 'Bandstop requires two cutoff frequencies'}
+    if filter_type not in _FILTER_TYPES:
         return {'filtered_signal': signal_data, 'error': 'Unknown filter type'}
     
-    filtered_fft = fft_signal * mask
-    filtered = np.real(np.fft.ifft(filtered_fft))
+    cutoff = tuple(cutoff_freq) if isinstance(cutoff_freq, list) else cutoff_freq
+    mask = _filter_mask(n, sample_rate, filter_type, cutoff)
+    
+    filtered_fft = scipy.fft.rfft(signal)
+    filtered_fft *= mask
+    filtered = scipy.fft.irfft(filtered_fft, n=n)
     
     result = {
-        'filtered_signal': filtered.tolist(),
+        'filtered_signal': filtered,
         'filter_type': filter_type,
         'cutoff_frequency': cutoff_freq,
         'order': order,
@@ -207,17 +294,27 @@ def filter_signal(signal_data, sample_rate, filter_type, cutoff_freq, order=4):
     return result
 
 def signal_statistics(signal_data):
-    signal = np.array(signal_data)
+    signal = np.asarray(signal_data, dtype=np.float64)
+    n = signal.size
+    
+    # Each statistic reuses the same few reductions: no squared or abs copies
+    lo = float(signal.min())
+    hi = float(signal.max())
+    mean = float(signal.sum()) / n
+    mean_sq = float(signal.dot(signal)) / n
+    deviation = signal - mean
+    rms = math.sqrt(mean_sq)
+    peak = max(abs(lo), abs(hi))
     
     result = {
-        'mean': float(np.mean(signal)),
-        'std': float(np.std(signal)),
-        'rms': float(np.sqrt(np.mean(signal**2))),
-        'peak': float(np.max(np.abs(signal))),
-        'peak_to_peak': float(np.max(signal) - np.min(signal)),
-        'crest_factor': float(np.max(np.abs(signal)) / np.sqrt(np.mean(signal**2))) if np.mean(signal**2) > 0 else 0,
-        'min': float(np.min(signal)),
-        'max': float(np.max(signal))
+        'mean': mean,
+        'std': math.sqrt(float(deviation.dot(deviation)) / n),
+        'rms': rms,
+        'peak': peak,
+        'peak_to_peak': hi - lo,
+        'crest_factor': peak / rms if mean_sq > 0 else 0,
+        'min': lo,
+        'max': hi
     }
     
     return result
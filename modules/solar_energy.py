@@ -1,5 +1,5 @@
 import numpy as np
-import math
+from bisect import bisect_left
 from database import save_calculation
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -7,20 +7,34 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 import os
 
-def panel_sizing(daily_energy_kwh, peak_sun_hours, system_efficiency=0.8, panel_wattage=400):
-    warnings = []
-    
+TYPICAL_PANEL_AREA_M2 = 2.0
+
+# Elementwise, so panel_sizing's scalars and compare_systems' columns share
+# one set of sizing formulas
+def _panel_sizing_core(daily_energy_kwh, peak_sun_hours, system_efficiency, panel_wattage):
     required_daily_production = daily_energy_kwh / system_efficiency
     
     required_capacity_kw = required_daily_production / peak_sun_hours
     
-    num_panels = math.ceil((required_capacity_kw * 1000) / panel_wattage)
+    num_panels = np.ceil((required_capacity_kw * 1000) / panel_wattage).astype(int)
     
     actual_capacity_kw = (num_panels * panel_wattage) / 1000
     actual_daily_production = actual_capacity_kw * peak_sun_hours * system_efficiency
     
-    typical_panel_area = 2.0
-    total_area = num_panels * typical_panel_area
+    total_area = num_panels * TYPICAL_PANEL_AREA_M2
+    
+    return required_capacity_kw, num_panels, actual_capacity_kw, actual_daily_production, total_area
+
+def panel_sizing(daily_energy_kwh, peak_sun_hours, system_efficiency=0.8, panel_wattage=400):
+    warnings = []
+    
+    required_capacity_kw, num_panels, actual_capacity_kw, actual_daily_production, total_area = _panel_sizing_core(
+        daily_energy_kwh, peak_sun_hours, system_efficiency, panel_wattage
+    )
+    num_panels = int(num_panels)
+    actual_capacity_kw = float(actual_capacity_kw)
+    actual_daily_production = float(actual_daily_production)
+    total_area = float(total_area)
     
     result = {
         'daily_energy_required_kwh': daily_energy_kwh,
@@ -84,14 +98,17 @@ def battery_sizing(daily_energy_kwh, autonomy_days, depth_of_discharge=0.8, batt
     
     return result, warnings
 
+STANDARD_INVERTER_SIZES_W = (1000, 1500, 2000, 3000, 4000, 5000, 6000, 8000, 10000)
+
 def inverter_sizing(peak_load_w, surge_factor=1.25, continuous_factor=1.1):
     warnings = []
     
     continuous_rating = peak_load_w * continuous_factor
     surge_rating = peak_load_w * surge_factor
     
-    standard_sizes = [1000, 1500, 2000, 3000, 4000, 5000, 6000, 8000, 10000]
-    recommended_size = min([s for s in standard_sizes if s >= continuous_rating], default=max(standard_sizes))
+    # Smallest standard size covering the rating, else the largest available
+    i = bisect_left(STANDARD_INVERTER_SIZES_W, continuous_rating)
+    recommended_size = STANDARD_INVERTER_SIZES_W[min(i, len(STANDARD_INVERTER_SIZES_W) - 1)]
     
     result = {
         'peak_load_w': peak_load_w,
@@ -137,39 +154,44 @@ def system_losses(panel_capacity_kw, soiling=0.02, shading=0.03, wiring=0.02, in
 def roi_analysis(system_cost, annual_production_kwh, electricity_rate, annual_degradation=0.005, incentives=0, years=25):
     warnings = []
     
-    cumulative_savings = 0
-    yearly_data = []
-    payback_year = None
+    net_cost = system_cost - incentives
+    year_numbers = np.arange(1, years + 1)
+    production = annual_production_kwh * (1 - annual_degradation) ** (year_numbers - 1)
+    savings = production * electricity_rate
+    cumulative = np.cumsum(savings)
+    cumulative_savings = float(cumulative[-1]) if years > 0 else 0
+    
+    paid_back = np.flatnonzero(cumulative >= net_cost)
+    payback_year = int(paid_back[0]) + 1 if paid_back.size else None
     
-    for year in range(1, years + 1):
-        degraded_production = annual_production_kwh * ((1 - annual_degradation) ** (year - 1))
-        yearly_savings = degraded_production * electricity_rate
-        cumulative_savings += yearly_savings
-        
-        yearly_data.append({
+    # Only the first five years are reported, so only they become dicts
+    yearly_data = [
+        {
             'year': year,
             'production_kwh': round(degraded_production, 1),
             'savings': round(yearly_savings, 2),
-            'cumulative_savings': round(cumulative_savings, 2)
-        })
-        
-        if payback_year is None and cumulative_savings >= (system_cost - incentives):
-            payback_year = year
+            'cumulative_savings': round(running_total, 2)
+        }
+        for year, degraded_production, yearly_savings, running_total in zip(
+            year_numbers[:5].tolist(), production[:5].tolist(),
+            savings[:5].tolist(), cumulative[:5].tolist()
+        )
+    ]
     
-    net_savings = cumulative_savings - (system_cost - incentives)
-    roi_percent = (net_savings / (system_cost - incentives)) * 100 if system_cost > incentives else 0
+    net_savings = cumulative_savings - net_cost
+    roi_percent = (net_savings / net_cost) * 100 if system_cost > incentives else 0
     
     result = {
         'system_cost': system_cost,
         'incentives': incentives,
-        'net_cost': system_cost - incentives,
+        'net_cost': net_cost,
         'annual_production_kwh': annual_production_kwh,
         'electricity_rate': electricity_rate,
         'payback_years': payback_year,
         'total_savings_25yr': round(cumulative_savings, 2),
         'net_savings': round(net_savings, 2),
         'roi_percent': round(roi_percent, 1),
-        'yearly_breakdown': yearly_data[:5]
+        'yearly_breakdown': yearly_data
     }
     
     if payback_year is None or payback_year > 15:
@@ -182,31 +204,49 @@ def roi_analysis(system_cost, annual_production_kwh, electricity_rate, annual_de
     return result, warnings
 
 def compare_systems(systems):
-    comparison = []
-    
-    for i, sys in enumerate(systems):
-        panel_result, _ = panel_sizing(
-            sys.get('daily_energy', 30),
-            sys.get('sun_hours', 4.5),
-            sys.get('efficiency', 0.8),
-            sys.get('panel_wattage', 400)
-        )
-        
-        comparison.append({
+    def column(name, default):
+        return np.fromiter((s.get(name, default) for s in systems), dtype=np.float64, count=len(systems))
+    
+    _, num_panels, capacity, production, area = _panel_sizing_core(
+        column('daily_energy', 30), column('sun_hours', 4.5),
+        column('efficiency', 0.8), column('panel_wattage', 400)
+    )
+    
+    comparison = [
+        {
             'system_id': i + 1,
             'name': sys.get('name', f'System {i+1}'),
-            'num_panels': panel_result['num_panels'],
-            'capacity_kw': panel_result['actual_capacity_kw'],
-            'daily_production': panel_result['estimated_daily_production_kwh'],
-            'area_m2': panel_result['total_array_area_m2']
-        })
+            'num_panels': panels,
+            'capacity_kw': round(capacity_kw, 2),
+            'daily_production': round(daily_production, 2),
+            'area_m2': round(area_m2, 1)
+        }
+        for i, (sys, panels, capacity_kw, daily_production, area_m2) in enumerate(zip(
+            systems, num_panels.tolist(), capacity.tolist(), production.tolist(), area.tolist()
+        ))
+    ]
     
     return comparison
 
+# Report styles never change, so build them once rather than per report.
+# Concurrent report threads may share them because builds only read them;
+# flowables are still created per report
+_STYLES = getSampleStyleSheet()
+_SOLAR_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
 def generate_solar_report(system_data, filename='solar_report.pdf'):
     filepath = os.path.join('static', 'plots', filename)
     doc = SimpleDocTemplate(filepath, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = _STYLES
     elements = []
     
     elements.append(Paragraph("Solar System Design Report", styles['Title']))
@@ -224,16 +264,7 @@ def generate_solar_report(system_data, filename='solar_report.pdf'):
     ]
     
     table = Table(specs_data, colWidths=[200, 200])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
+    table.setStyle(_SOLAR_TABLE_STYLE)
     elements.append(table)
     
     elements.append(Spacer(1, 20))
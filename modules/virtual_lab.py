@@ -1,5 +1,6 @@
 import numpy as np
 import math
+from types import MappingProxyType
 from database import save_lab_report
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -35,17 +36,30 @@ EXPERIMENTS = {
     }
 }
 
+# Shared with every caller, so expose read-only views over the records
+EXPERIMENTS = MappingProxyType({
+    name: MappingProxyType({**spec, 'parameters': tuple(spec['parameters'])})
+    for name, spec in EXPERIMENTS.items()
+})
+
+_TWO_PI = 2 * math.pi
+# Boltzmann constant over the elementary charge: thermal voltage per kelvin
+_VT_PER_KELVIN = 1.380649e-23 / 1.602176634e-19
+
 def run_rc_transient(resistance, capacitance, voltage, duration_multiplier=5):
     tau = resistance * capacitance
     duration = tau * duration_multiplier
     
     t = np.linspace(0, duration, 1000)
     
-    v_charging = voltage * (1 - np.exp(-t / tau))
-    i_charging = (voltage / resistance) * np.exp(-t / tau)
+    # All four curves share the same decay, so evaluate the exponential once
+    decay = np.exp(-t / tau)
     
-    v_discharging = voltage * np.exp(-t / tau)
-    i_discharging = -(voltage / resistance) * np.exp(-t / tau)
+    v_discharging = voltage * decay
+    v_charging = voltage - v_discharging
+    
+    i_charging = (voltage / resistance) * decay
+    i_discharging = -i_charging
     
     time_63 = tau
     time_95 = 3 * tau
@@ -60,14 +74,14 @@ def run_rc_transient(resistance, capacitance, voltage, duration_multiplier=5):
         },
         'time_constant_s': tau,
         'charging': {
-            'time': t.tolist(),
-            'voltage': v_charging.tolist(),
-            'current': i_charging.tolist()
+            'time': t,
+            'voltage': v_charging,
+            'current': i_charging
         },
         'discharging': {
-            'time': t.tolist(),
-            'voltage': v_discharging.tolist(),
-            'current': i_discharging.tolist()
+            'time': t,
+            'voltage': v_discharging,
+            'current': i_discharging
         },
         'key_times': {
             'time_63_percent': time_63,
@@ -80,11 +94,13 @@ def run_rc_transient(resistance, capacitance, voltage, duration_multiplier=5):
     return result
 
 def run_rlc_resonance(resistance, inductance, capacitance, freq_start=10, freq_end=100000, points=500):
-    f0 = 1 / (2 * math.pi * math.sqrt(inductance * capacitance))
-    q_factor = (1 / resistance) * math.sqrt(inductance / capacitance)
+    f0 = 1 / (_TWO_PI * math.sqrt(inductance * capacitance))
+    # Q and damping both scale with the characteristic impedance sqrt(L/C)
+    characteristic_impedance = math.sqrt(inductance / capacitance)
+    q_factor = (1 / resistance) * characteristic_impedance
     bandwidth = f0 / q_factor if q_factor > 0 else float('inf')
     
-    damping = resistance / (2 * math.sqrt(inductance / capacitance))
+    damping = resistance / (2 * characteristic_impedance)
     if damping < 1:
         response_type = 'Underdamped'
     elif damping == 1:
@@ -94,21 +110,11 @@ def run_rlc_resonance(resistance, inductance, capacitance, freq_start=10, freq_e
     
     frequencies = np.logspace(np.log10(freq_start), np.log10(freq_end), points)
     
-    impedances = []
-    phases = []
-    gains = []
-    
-    for f in frequencies:
-        omega = 2 * math.pi * f
-        xl = omega * inductance
-        xc = 1 / (omega * capacitance)
-        z = math.sqrt(resistance**2 + (xl - xc)**2)
-        phase = math.degrees(math.atan2(xl - xc, resistance))
-        gain_db = 20 * np.log10(resistance / z)
-        
-        impedances.append(z)
-        phases.append(phase)
-        gains.append(gain_db)
+    omega = _TWO_PI * frequencies
+    reactance = omega * inductance - 1 / (omega * capacitance)
+    impedances = np.sqrt(resistance**2 + reactance**2)
+    phases = np.degrees(np.arctan2(reactance, resistance))
+    gains = 20 * np.log10(resistance / impedances)
     
     result = {
         'experiment': 'RLC Resonance',
@@ -123,7 +129,7 @@ def run_rlc_resonance(resistance, inductance, capacitance, freq_start=10, freq_e
         'damping_factor': damping,
         'response_type': response_type,
         'frequency_response': {
-            'frequencies': frequencies.tolist(),
+            'frequencies': frequencies,
             'impedances': impedances,
             'phases': phases,
             'gains_db': gains
@@ -133,19 +139,35 @@ def run_rlc_resonance(resistance, inductance, capacitance, freq_start=10, freq_e
     
     return result
 
+DIODE_FORWARD_SWEEP_V = 0.8
+DIODE_ON_CURRENT_A = 1e-3
+
+def _shockley_current(voltage, saturation_current, nvt):
+    # One buffer for the whole expression; expm1 also keeps the
+    # near-zero-bias currents exact where exp(x) - 1 would cancel
+    current = np.divide(voltage, nvt)
+    np.expm1(current, out=current)
+    current *= saturation_current
+    return current
+
 def run_diode_characteristics(saturation_current=1e-12, ideality_factor=1, temperature=300):
-    k = 1.380649e-23
-    q = 1.602176634e-19
-    vt = k * temperature / q
+    vt = _VT_PER_KELVIN * temperature
+    
+    nvt = ideality_factor * vt
     
-    v_forward = np.linspace(0, 0.8, 200)
-    i_forward = saturation_current * (np.exp(v_forward / (ideality_factor * vt)) - 1)
+    v_forward = np.linspace(0, DIODE_FORWARD_SWEEP_V, 200)
+    i_forward = _shockley_current(v_forward, saturation_current, nvt)
     
     v_reverse = np.linspace(-5, 0, 100)
-    i_reverse = saturation_current * (np.exp(v_reverse / (ideality_factor * vt)) - 1)
+    i_reverse = _shockley_current(v_reverse, saturation_current, nvt)
     
-    v_on_idx = np.argmax(i_forward > 1e-3)
-    v_on = v_forward[v_on_idx] if v_on_idx > 0 else 0.7
+    # Invert the Shockley equation at the turn-on current rather than
+    # scanning the sweep; fall back to 0.7V when it lies beyond the sweep
+    v_on = 0.7
+    if saturation_current > 0:
+        v_crossing = ideality_factor * vt * math.log1p(DIODE_ON_CURRENT_A / saturation_current)
+        if 0 < v_crossing <= DIODE_FORWARD_SWEEP_V:
+            v_on = v_crossing
     
     result = {
         'experiment': 'Diode I-V Characteristics',
@@ -157,12 +179,12 @@ def run_diode_characteristics(saturation_current=1e-12, ideality_factor=1, tempe
         'thermal_voltage_v': vt,
         'forward_voltage_v': v_on,
         'forward_characteristics': {
-            'voltage': v_forward.tolist(),
-            'current': i_forward.tolist()
+            'voltage': v_forward,
+            'current': i_forward
         },
         'reverse_characteristics': {
-            'voltage': v_reverse.tolist(),
-            'current': i_reverse.tolist()
+            'voltage': v_reverse,
+            'current': i_reverse
         },
         'conclusion': f'The diode has a forward voltage of approximately {v_on:.3f}V at 1mA. At {temperature}K, the thermal voltage is {vt*1000:.2f}mV. The reverse leakage current is {saturation_current*1e12:.2f}pA.'
     }
@@ -175,16 +197,13 @@ def run_amplifier_gain(dc_gain=100, bandwidth=1e6, input_impedance=10000, freq_s
     
     frequencies = np.logspace(np.log10(freq_start), np.log10(freq_end), points)
     
-    gains = []
-    phases = []
+    ratio = frequencies / bandwidth
+    # 20*log10(A/sqrt(1+r^2)) split into the DC gain and a roll-off term,
+    # which drops the sqrt and the divide from the sweep
+    gains = gain_db - 10 * np.log10(1 + ratio**2)
+    phases = -np.degrees(np.arctan(ratio))
     
-    for f in frequencies:
-        gain = dc_gain / math.sqrt(1 + (f / bandwidth)**2)
-        phase = -math.degrees(math.atan(f / bandwidth))
-        gains.append(20 * np.log10(gain))
-        phases.append(phase)
-    
-    cutoff_idx = np.argmin(np.abs(np.array(gains) - (gain_db - 3)))
+    cutoff_idx = np.argmin(np.abs(gains - (gain_db - 3)))
     measured_bandwidth = frequencies[cutoff_idx]
     
     result = {
@@ -198,7 +217,7 @@ def run_amplifier_gain(dc_gain=100, bandwidth=1e6, input_impedance=10000, freq_s
         'gain_bandwidth_product': gbw,
         'measured_bandwidth_hz': measured_bandwidth,
         'frequency_response': {
-            'frequencies': frequencies.tolist(),
+            'frequencies': frequencies,
             'gains_db': gains,
             'phases': phases
         },
@@ -207,28 +226,29 @@ def run_amplifier_gain(dc_gain=100, bandwidth=1e6, input_impedance=10000, freq_s
     
     return result
 
-def add_tolerance_error(value, tolerance_percent):
-    error = value * (tolerance_percent / 100) * np.random.uniform(-1, 1)
-    return value + error
+EXPERIMENT_RUNNERS = {
+    'rc_transient': run_rc_transient,
+    'rlc_resonance': run_rlc_resonance,
+    'diode_characteristics': run_diode_characteristics,
+    'amplifier_gain': run_amplifier_gain
+}
+
+_rng = np.random.default_rng()
 
 def run_experiment_with_tolerance(experiment_name, params, tolerance_percent=5):
-    params_with_error = {}
-    for key, value in params.items():
-        if isinstance(value, (int, float)) and value != 0:
-            params_with_error[key] = add_tolerance_error(value, tolerance_percent)
-        else:
-            params_with_error[key] = value
-    
-    if experiment_name == 'rc_transient':
-        result = run_rc_transient(**params_with_error)
-    elif experiment_name == 'rlc_resonance':
-        result = run_rlc_resonance(**params_with_error)
-    elif experiment_name == 'diode_characteristics':
-        result = run_diode_characteristics(**params_with_error)
-    elif experiment_name == 'amplifier_gain':
-        result = run_amplifier_gain(**params_with_error)
-    else:
+    params_with_error = dict(params)
+    numeric_keys = [key for key, value in params.items()
+                    if isinstance(value, (int, float)) and value != 0]
+    # One draw covers every toleranced parameter
+    errors = _rng.uniform(-1, 1, len(numeric_keys)) * (tolerance_percent / 100)
+    for key, error in zip(numeric_keys, errors.tolist()):
+        value = params[key]
+        params_with_error[key] = value + value * error
+    
+    runner = EXPERIMENT_RUNNERS.get(experiment_name)
+    if runner is None:
         return {'error': 'Unknown experiment'}
+    result = runner(**params_with_error)
     
     result['tolerance_applied'] = tolerance_percent
     result['actual_parameters'] = params_with_error
@@ -236,6 +256,118 @@ def run_experiment_with_tolerance(experiment_name, params, tolerance_percent=5):
     
     return result
 
+# Vectorized figures of merit for each experiment; every parameter may be
+# an array of samples, and the defaults match the runners'
+def _rc_metrics(resistance, capacitance, **_):
+    return {'time_constant_s': resistance * capacitance}
+
+def _rlc_metrics(resistance, inductance, capacitance, **_):
+    f0 = 1 / (_TWO_PI * np.sqrt(inductance * capacitance))
+    characteristic_impedance = np.sqrt(inductance / capacitance)
+    q_factor = (1 / resistance) * characteristic_impedance
+    return {
+        'resonant_frequency_hz': f0,
+        'q_factor': q_factor,
+        'bandwidth_hz': f0 / q_factor,
+        'damping_factor': resistance / (2 * characteristic_impedance)
+    }
+
+def _diode_metrics(saturation_current=1e-12, ideality_factor=1, temperature=300, **_):
+    vt = _VT_PER_KELVIN * temperature
+    with np.errstate(divide='ignore'):
+        v_on = ideality_factor * vt * np.log1p(DIODE_ON_CURRENT_A / saturation_current)
+    v_on = np.where((v_on > 0) & (v_on <= DIODE_FORWARD_SWEEP_V), v_on, 0.7)
+    return {'thermal_voltage_v': vt, 'forward_voltage_v': v_on}
+
+def _amplifier_metrics(dc_gain=100, bandwidth=1e6, **_):
+    return {'dc_gain_db': 20 * np.log10(dc_gain), 'gain_bandwidth_product': dc_gain * bandwidth}
+
+MONTE_CARLO_METRICS = {
+    'rc_transient': _rc_metrics,
+    'rlc_resonance': _rlc_metrics,
+    'diode_characteristics': _diode_metrics,
+    'amplifier_gain': _amplifier_metrics
+}
+MONTE_CARLO_MAX_SAMPLES = 100_000
+
+def run_experiment_monte_carlo(experiment_name, params, samples=1000, tolerance_percent=5):
+    """Figures of merit over `samples` toleranced parameter sets, one array per metric"""
+    metrics = MONTE_CARLO_METRICS.get(experiment_name)
+    if metrics is None:
+        return {'error': 'Unknown experiment'}
+    
+    numeric_keys = [key for key, value in params.items()
+                    if isinstance(value, (int, float)) and value != 0]
+    # One draw for every sample of every parameter, one row per parameter
+    errors = _rng.uniform(-1, 1, (len(numeric_keys), samples)) * (tolerance_percent / 100)
+    sampled = dict(params)
+    for key, error in zip(numeric_keys, errors):
+        value = params[key]
+        sampled[key] = value + value * error
+    
+    # Metrics fed only by untoleranced parameters come back as scalars
+    values = {name: np.full(samples, value) if np.ndim(value) == 0 else value
+              for name, value in metrics(**sampled).items()}
+    
+    return {
+        'experiment': experiment_name,
+        'samples': samples,
+        'tolerance_applied': tolerance_percent,
+        'nominal_parameters': params,
+        'sampled_parameters': {key: sampled[key] for key in numeric_keys},
+        'metrics': values
+    }
+
+CURVE_KEYS = ('charging', 'discharging', 'frequency_response',
+              'forward_characteristics', 'reverse_characteristics')
+DOWNSAMPLE_POINTS = 128
+
+def downsample_result(result, max_points=DOWNSAMPLE_POINTS):
+    """Thin every curve in an experiment result to at most max_points samples"""
+    for key in CURVE_KEYS:
+        curve = result.get(key)
+        if not curve:
+            continue
+        n = len(next(iter(curve.values())))
+        if n <= max_points:
+            continue
+        # Evenly spaced indices keep both endpoints, and stay log-spaced on
+        # the logspace frequency sweeps; fancy indexing gives contiguous copies
+        keep = np.linspace(0, n - 1, max_points).round().astype(np.intp)
+        result[key] = {name: np.asarray(values)[keep] for name, values in curve.items()}
+    return result
+
+# Shared by every lab report; the stylesheet and table styles are only read
+# when a document is built
+_STYLES = getSampleStyleSheet()
+_PARAM_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+_RESULT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+# Keys already shown elsewhere in the report, or curves it never draws
+_REPORT_SKIP_KEYS = frozenset(CURVE_KEYS) | {
+    'experiment', 'parameters', 'conclusion',
+    'tolerance_applied', 'actual_parameters', 'nominal_parameters'
+}
+
+def _report_row(key, value):
+    label = key.replace('_', ' ').title()
+    return [label, f'{value:.6g}' if isinstance(value, float) else str(value)]
+
 def generate_lab_report(experiment_result, filename=None):
     if filename is None:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -244,7 +376,7 @@ def generate_lab_report(experiment_result, filename=None):
     filepath = os.path.join('static', 'plots', filename)
     
     doc = SimpleDocTemplate(filepath, pagesize=letter)
-    styles = getSampleStyleSheet()
+    styles = _STYLES
     elements = []
     
     elements.append(Paragraph("Virtual Electronics Lab Report", styles['Title']))
@@ -257,49 +389,24 @@ def generate_lab_report(experiment_result, filename=None):
     elements.append(Paragraph("Parameters", styles['Heading3']))
     params = experiment_result.get('parameters', {})
     param_data = [['Parameter', 'Value']]
-    for key, value in params.items():
-        if isinstance(value, float):
-            param_data.append([key.replace('_', ' ').title(), f'{value:.6g}'])
-        else:
-            param_data.append([key.replace('_', ' ').title(), str(value)])
+    param_data += [_report_row(key, value) for key, value in params.items()]
     
     param_table = Table(param_data, colWidths=[200, 200])
-    param_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
+    param_table.setStyle(_PARAM_TABLE_STYLE)
     elements.append(param_table)
     elements.append(Spacer(1, 15))
     
     elements.append(Paragraph("Results", styles['Heading3']))
     
-    skip_keys = ['experiment', 'parameters', 'charging', 'discharging', 'frequency_response', 
-                 'forward_characteristics', 'reverse_characteristics', 'conclusion',
-                 'tolerance_applied', 'actual_parameters', 'nominal_parameters']
-    
     result_data = [['Metric', 'Value']]
-    for key, value in experiment_result.items():
-        if key not in skip_keys and not isinstance(value, (dict, list)):
-            if isinstance(value, float):
-                result_data.append([key.replace('_', ' ').title(), f'{value:.6g}'])
-            else:
-                result_data.append([key.replace('_', ' ').title(), str(value)])
+    result_data += [
+        _report_row(key, value) for key, value in experiment_result.items()
+        if key not in _REPORT_SKIP_KEYS and not isinstance(value, (dict, list))
+    ]
     
     if len(result_data) > 1:
         result_table = Table(result_data, colWidths=[200, 200])
-        result_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
+        result_table.setStyle(_RESULT_TABLE_STYLE)
         elements.append(result_table)
     
     elements.append(Spacer(1, 15))